@@ -2,8 +2,9 @@
 import cplex
 from cplex.exceptions import CplexError
 import csv
+import hashlib
 import time
-from igraph import Graph
+import numpy as np
 
 class RegnierProblem:
 
@@ -12,7 +13,7 @@ class RegnierProblem:
     Clustering qualitative data through Integer Linear Programming.
 
     Attributes:
-        S (list of list of int): Similarity Matrix
+        S (numpy.ndarray of int): Similarity Matrix, only its upper triangle (i<j) stored row by row
         n (int): Number of instances
         m (int): Number of attributes
 
@@ -35,45 +36,77 @@ class RegnierProblem:
 
         """
         
-        self._S=[]
-        self._n=0
-        self._m=0
-
         # Store dataset files in matrix 'D' and get 'n' and 'm' values
-        D=[]
         with open(dataset, 'r') as csvfile:
             spamreader = csv.reader(csvfile, delimiter=' ', quotechar='|')
-            for row in spamreader:
-                D.append([])
-                for v in row:
-                    D[self._n].append(v)
-                    self._m = self._m + 1
-                self._n = self._n + 1
-            self._m=self._m//self._n
-
-        # Create similarity matrix. Initializing it with -m-1 in the lower triangle of matrix 'S'
-        for i in range(self._n):
-            self._S.append([])
-            for j in range (self._n):
-                self._S[i].append(-self._m -1)
+            rows = [row for row in spamreader]
+
+        # As in the first versions, 'm' is the number of values divided by 'n' and only the first
+        # 'm' values of each line are used, but never more values than the shortest line has, so
+        # the empty values of spaces at the end of some lines are ignored
+        m = min(sum(len(row) for row in rows)//len(rows), min(len(row) for row in rows))
+        D = np.array([row[:m] for row in rows])
+        self._n, self._m = D.shape
 
-        # Calculate the simetric difference between each instance and store it in 'S'. 
-        # The (-) negates the distance, transforming it into a similarity measure.
         # Missing values "?" are ignored in the similarity calculus.
-        for i in range(self._n):
-            for j in range (self._n):
-                if i != j:
-                    total = 0
-                    total_missing = 0
-                    for k in range(self._m):
-                        if D[i][k] != "?" and D[j][k] != "?":
-                            if D[i][k] == D[j][k]:
-                                total = total + 1
-                        else:
-                            total_missing = total_missing + 1
-                    self._S[i][j] = -((self._m - total_missing) - 2*(total))
-        
-    def runRM(self,lp_problem=False,debug=False,model_file=None):
+        valid = (D != "?")
+
+        # Label encoding of each attribute, its values are numbered from 0 and the missing
+        # values are -1. The codes use the smallest integer type that fits all of them.
+        labels = [np.unique(D[valid[:,k],k], return_inverse=True) for k in range(self._m)]
+        sizes = [len(values) for values,_ in labels]
+        C = np.full((self._n, self._m), -1, dtype=np.min_scalar_type(-max(sizes+[1])))
+        for k,(_,inverse) in enumerate(labels):
+            C[valid[:,k],k] = inverse.ravel()
+
+        # One-hot encoding of the codes, where each column of 'E' is one value of one attribute.
+        # The products (E E^T) and (V V^T) count, for each pair of instances, the attributes with
+        # equal values and the attributes present in both instances. The counts are exact in float32.
+        offsets = np.cumsum([0]+sizes)
+        rows, attributes = np.nonzero(valid)
+        E = np.zeros((self._n, offsets[-1]), dtype=np.float32)
+        E[rows, offsets[attributes] + C[rows, attributes]] = 1
+        V = valid.astype(np.float32)
+        total = np.dot(E, E.T)
+        both_valid = np.dot(V, V.T)
+
+        # Calculate the simetric difference between each instance and store it in 'S'. 
+        # The distance is negated (2*total - both_valid), transforming it into a similarity measure.
+        # 'S' is symmetric and the models only use the pairs i<j, so only the upper 
+        # triangle is kept, in the same order of the variables.
+        # The rows of the triangle are copied as slices, avoiding the index arrays of all pairs.
+        total *= 2
+        total -= both_valid
+        # The similarities are between -m and m, they are stored in the smallest integer type
+        # that also holds the sum of two of them, as done by the Beta models.
+        S_type = np.min_scalar_type(-2*max(self._m,1)-1)
+        self._S = np.concatenate([total[i,i+1:] for i in range(self._n)]).astype(S_type)
+
+        # Results of the cut heuristics, computed on their first use. They only depend on 'S',
+        # so they are shared by all the models and indexed by a digest of its contents.
+        self._heuristics = {}
+
+        # Problems with only the objective function, copied by every model. They are
+        # indexed by the pair (lp_problem, named) used to create the variables.
+        self._base_probs = {}
+
+    def __getstate__(self):
+        """Pickling state.
+
+        Used when the instance is sent to the workers of 'runAll'. The problems in '_base_probs'
+        are dropped, since CPLEX objects can not be pickled, and each worker creates its own.
+
+        Returns:
+            A copy of the instance attributes with an empty '_base_probs'.
+        
+        """
+
+        state = self.__dict__.copy()
+        state['_base_probs'] = {}
+        return state
+        
+    def runRM(self,lp_problem=False,debug=False,model_file=None,warmstart_lp=False,
+              mip_rel_gap=None,threads=None,time_limit=None):
         """Original Model (RM)
 
         Creates the original model of Regnier Problem and runs in CPLEX.
@@ -82,6 +115,12 @@ class RegnierProblem:
             lp_problem (bool,optional): If True run as Linear Programming instead of ILP.
             debug (bool,optional): Show debug information, mostly CPLEX output.
             model_file (str,optional): Save the model to .lp format file.
+            mip_rel_gap (float,optional): Relative MIP gap tolerance, CPLEX default if None.
+            threads (int,optional): Number of threads used by CPLEX, CPLEX default if None.
+            time_limit (float,optional): Time limit of the solver in seconds, no limit if None.
+            warmstart_lp (bool,optional): If True solve the LP relaxation first and use the partition
+                of its rounded solution as MIP start. The LP solve is included in 'time_solver' and
+                counts towards 'time_limit'.
 
         Returns:
             A Solution object.
@@ -94,97 +133,44 @@ class RegnierProblem:
         # Create IP Model
         ##############################
         try:
-            # Create cplex instance
-            my_prob = cplex.Cplex()
-
-            if not debug:
-                # Disable cplex output
-                my_prob.set_log_stream(None)
-                my_prob.set_error_stream(None)
-                my_prob.set_warning_stream(None)
-                my_prob.set_results_stream(None)
-            
-            # Define it as a maximization problem
-            my_prob.objective.set_sense(my_prob.objective.sense.maximize)
+            # Create cplex instance with the objective function
+            my_prob, X = self.__createProblem(lp_problem,debug,named=(model_file != None))
 
-            # Variables matrix
-            X=[]
-            for i in range(self._n):
-                X.append([])
-                for j in range(self._n):
-                    X[i].append(0)
+            # Solver parameters
+            self.__setParameters(my_prob,mip_rel_gap,threads,time_limit)
 
-            # Create Objective Function
-            if lp_problem==True:
-                for i in range(self._n):
-                    for j in range(i+1,self._n):
-                        var_name = "v."+str(i)+"."+str(j)
-                        X[i][j] = my_prob.variables.get_num()
-                        my_prob.variables.add(obj = [self._S[i][j]], 
-                                                     lb = [0], 
-                                                     ub = [1], 
-                                                     names = [var_name],
-                                                     types = [my_prob.variables.type.continuous] )
-            else:
-                for i in range(self._n):
-                    for j in range(i+1,self._n):
-                        var_name = "v."+str(i)+"."+str(j)
-                        X[i][j] = my_prob.variables.get_num()
-                        my_prob.variables.add(obj = [self._S[i][j]], 
-                                                     lb = [0], 
-                                                     ub = [1], 
-                                                     names = [var_name],
-                                                     types = [my_prob.variables.type.binary] )
-            
             # Insert Constraints
-            for i in range(self._n):
-                for j in range(i+1,self._n):
-                    for k in range(j+1,self._n):
-                        # Constraints
-                        # dij + djk  - dki <= 1
-                        the_vars  = []
-                        the_coefs = []
-                        the_vars.append(X[i][j])
-                        the_coefs.append(1)
-                        the_vars.append(X[j][k])
-                        the_coefs.append(1)
-                        the_vars.append(X[i][k])
-                        the_coefs.append(-1)
-                        my_prob.linear_constraints.add(lin_expr = \
-                                                       [cplex.SparsePair(the_vars, the_coefs)],
-                                                       senses = ["L"], rhs = [1])
-                        # dij - djk  + dki <= 1
-                        the_vars  = []
-                        the_coefs = []
-                        the_vars.append(X[i][j])
-                        the_coefs.append(1)
-                        the_vars.append(X[j][k])
-                        the_coefs.append(-1)
-                        the_vars.append(X[i][k])
-                        the_coefs.append(1)
-                        my_prob.linear_constraints.add(lin_expr = \
-                                                       [cplex.SparsePair(the_vars, the_coefs)],
-                                                       senses = ["L"], rhs = [1])
-                        # -dij  + djk  + dki <= 1
-                        the_vars  = []
-                        the_coefs = []
-                        the_vars.append(X[i][j])
-                        the_coefs.append(-1)
-                        the_vars.append(X[j][k])
-                        the_coefs.append(1)
-                        the_vars.append(X[i][k])
-                        the_coefs.append(1)
-                        my_prob.linear_constraints.add(lin_expr = \
-                                                       [cplex.SparsePair(the_vars, the_coefs)],
-                                                       senses = ["L"], rhs = [1])
+            constraints = []
+            for i,J,K in self.__triangles():
+                constraints.append(self.__triangleConstraints(X,i,J,K))
+
+            self.__addConstraints(my_prob,constraints)
 
-            
             # Save model
             if(model_file != None):
                 my_prob.write(model_file)
                         
             # Solve
             time_solver = my_prob.get_time()
+
+            # Warm start with the partition of the rounded LP relaxation
+            if warmstart_lp==True and lp_problem==False:
+                relaxation = cplex.Cplex(my_prob)
+                if not debug:
+                    # Disable cplex output
+                    relaxation.set_log_stream(None)
+                    relaxation.set_error_stream(None)
+                    relaxation.set_warning_stream(None)
+                    relaxation.set_results_stream(None)
+                self.__setParameters(relaxation,threads=threads,time_limit=time_limit)
+                relaxation.set_problem_type(relaxation.problem_type.LP)
+                relaxation.solve()
+                self.__addMIPStart(my_prob,X,self.__extractGroups(relaxation.solution.get_values(),X))
+
+                # The MIP only gets the time left after the relaxation
+                if time_limit != None:
+                    my_prob.parameters.timelimit.set(max(time_limit - (my_prob.get_time() - time_solver), 0))
+
             my_prob.solve()
             time_solver = my_prob.get_time() - time_solver
 
@@ -201,47 +187,31 @@ class RegnierProblem:
             x = my_prob.solution.get_values()
 
             # Creating partition
-            groups = []
-            for i in range(self._n):
-                groups.append(-1)
-
-            groupID = 0
-            for i in range(self._n):
-                for j in range(i+1,self._n):
-                    index = X[i][j]
-                    if x[index] > 0:
-                        # Both objects don't have group, put then together on a new
-                        if groups[i] == -1 and groups[j] == -1:
-                            groups[i] = groupID
-                            groups[j] = groupID
-                            groupID = groupID + 1
-                        else:
-                            # If i object don't have group put him on j group
-                            if groups[i] == -1:
-                                groups[i] = groups[j]
-                            else:
-                                groups[j] = groups[i]
-
-            # The objects that remained alone create its own group
-            for i in range(len(groups)):
-                if groups[i] == -1:
-                    groups[i] = groupID
-                    groupID = groupID + 1
-                        
+            groups = self.__extractGroups(x,X)
+
+            # Relative gap tolerance used and gap achieved by the MIP solution
+            mip_rel_gap = my_prob.parameters.mip.tolerances.mipgap.get()
+            gap = None
+            if lp_problem==False:
+                gap = my_prob.solution.MIP.get_mip_relative_gap()
+
             # Make solution object to return
             solution = {'num_rows':num_rows,
                         'num_cols':num_cols,
                         'objective':objective,
                         'time_solver':time_solver,
                         'heuristic':None,
-                        'groups':groups}
+                        'groups':groups,
+                        'mip_rel_gap':mip_rel_gap,
+                        'gap':gap}
         
         except CplexError as exc:
             print (exc)
          
         return solution
 
-    def runRMalpha(self,cut=0,lp_problem=False,debug=False,model_file=None):
+    def runRMalpha(self,cut=0,lp_problem=False,debug=False,model_file=None,warmstart_groups=None,
+                   mip_rel_gap=None,threads=None,time_limit=None):
         """Alpha Model (RMalpha0)
 
         Creates the Alpha model proposed by Miyauchi and Sukegawa[1] and runs in CPLEX.
@@ -255,6 +225,10 @@ class RegnierProblem:
             lp_problem (bool,optional): If True run as Linear Programming instead of ILP.
             debug (bool,optional): Show debug information, mostly CPLEX output.
             model_file (str,optional): Save the model to .lp format file.
+            mip_rel_gap (float,optional): Relative MIP gap tolerance, CPLEX default if None.
+            threads (int,optional): Number of threads used by CPLEX, CPLEX default if None.
+            time_limit (float,optional): Time limit of the solver in seconds, no limit if None.
+            warmstart_groups (list of int,optional): A partition used as MIP start, ignored when lp_problem is True.
 
         Returns:
             A Solution object.
@@ -269,92 +243,30 @@ class RegnierProblem:
         ### MODELO CPLEX
         try:
 
-            # Create cplex instance
-            my_prob = cplex.Cplex()
-
-            if debug == False:
-                # Disable cplex output
-                my_prob.set_log_stream(None)
-                my_prob.set_error_stream(None)
-                my_prob.set_warning_stream(None)
-                my_prob.set_results_stream(None)
-
-            # Define it as a maximization problem
-            my_prob.objective.set_sense(my_prob.objective.sense.maximize)
+            # Create cplex instance with the objective function
+            my_prob, X = self.__createProblem(lp_problem,debug,named=(model_file != None))
 
-            # Variables matrix
-            X=[]
-            for i in range(self._n):
-                X.append([])
-                for j in range(self._n):
-                    X[i].append(0)
-
-            # Create Objective Function
-            if lp_problem==True:
-                for i in range(self._n):
-                    for j in range(i+1,self._n):
-                        var_name = "v."+str(i)+"."+str(j)
-                        X[i][j] = my_prob.variables.get_num()
-                        my_prob.variables.add(obj = [self._S[i][j]], 
-                                                     lb = [0], 
-                                                     ub = [1], 
-                                                     names = [var_name],
-                                                     types = [my_prob.variables.type.continuous] )
-            else:
-                for i in range(self._n):
-                    for j in range(i+1,self._n):
-                        var_name = "v."+str(i)+"."+str(j)
-                        X[i][j] = my_prob.variables.get_num()
-                        my_prob.variables.add(obj = [self._S[i][j]], 
-                                                     lb = [0], 
-                                                     ub = [1], 
-                                                     names = [var_name],
-                                                     types = [my_prob.variables.type.binary] )
+            # Solver parameters
+            self.__setParameters(my_prob,mip_rel_gap,threads,time_limit)
 
             # Insert Constraints
-            for i in range(self._n):
-                for j in range(i+1,self._n):
-                    for k in range(j+1,self._n):
-                        if (self._S[i][j] >= cut or self._S[j][k] >= cut):
-                            # Constraints
-                            # dij + djk  - dki <= 1
-                            the_vars  = []
-                            the_coefs = []
-                            the_vars.append(X[i][j])
-                            the_coefs.append(1)
-                            the_vars.append(X[j][k])
-                            the_coefs.append(1)
-                            the_vars.append(X[i][k])
-                            the_coefs.append(-1)
-                            my_prob.linear_constraints.add(lin_expr = \
-                                                           [cplex.SparsePair(the_vars, the_coefs)],
-                                                           senses = ["L"], rhs = [1])
-                        if (self._S[i][j] >= cut or self._S[i][k] >= cut):        
-                            # dij - djk  + dki <= 1
-                            the_vars  = []
-                            the_coefs = []
-                            the_vars.append(X[i][j])
-                            the_coefs.append(1)
-                            the_vars.append(X[j][k])
-                            the_coefs.append(-1)
-                            the_vars.append(X[i][k])
-                            the_coefs.append(1)
-                            my_prob.linear_constraints.add(lin_expr = \
-                                                           [cplex.SparsePair(the_vars, the_coefs)],
-                                                           senses = ["L"], rhs = [1])
-                        if (self._S[j][k] >= cut or self._S[i][k] >= cut):
-                            # -dij  + djk  + dki <= 1
-                            the_vars  = []
-                            the_coefs = []
-                            the_vars.append(X[i][j])
-                            the_coefs.append(-1)
-                            the_vars.append(X[j][k])
-                            the_coefs.append(1)
-                            the_vars.append(X[i][k])
-                            the_coefs.append(1)
-                            my_prob.linear_constraints.add(lin_expr = \
-                                                           [cplex.SparsePair(the_vars, the_coefs)],
-                                                           senses = ["L"], rhs = [1])
+            constraints = []
+            S = self._S
+            for i,J,K in self.__triangles():
+                Sij = S[self.__pair(i,J)]
+                Sjk = S[self.__pair(J,K)]
+                Sik = S[self.__pair(i,K)]
+                ij = Sij >= cut
+                jk = Sjk >= cut
+                ik = Sik >= cut
+                masks = (ij | jk, ij | ik, jk | ik)
+                constraints.append(self.__triangleConstraints(X,i,J,K,masks))
+
+            self.__addConstraints(my_prob,constraints)
+
+            # Warm start
+            if warmstart_groups is not None and lp_problem==False:
+                self.__addMIPStart(my_prob,X,warmstart_groups)
 
             # Save model
             if(model_file != None):
@@ -378,46 +290,30 @@ class RegnierProblem:
             x = my_prob.solution.get_values()
 
             # Creating partition
-            groups = []
-            for i in range(self._n):
-                groups.append(-1)
-
-            groupID = 0
-            for i in range(self._n):
-                for j in range(i+1,self._n):
-                    index = X[i][j]
-                    if x[index] > 0:
-                        # Both objects don't have group, put then together on a new
-                        if groups[i] == -1 and groups[j] == -1:
-                            groups[i] = groupID
-                            groups[j] = groupID
-                            groupID = groupID + 1
-                        else:
-                            # If i object don't have group put him on j group
-                            if groups[i] == -1:
-                                groups[i] = groups[j]
-                            else:
-                                groups[j] = groups[i]
-
-            # The objects that remained alone create its own group
-            for i in range(len(groups)):
-                if groups[i] == -1:
-                    groups[i] = groupID
-                    groupID = groupID + 1
+            groups = self.__extractGroups(x,X)
+
+            # Relative gap tolerance used and gap achieved by the MIP solution
+            mip_rel_gap = my_prob.parameters.mip.tolerances.mipgap.get()
+            gap = None
+            if lp_problem==False:
+                gap = my_prob.solution.MIP.get_mip_relative_gap()
 
             solution = {'num_rows':num_rows,
                         'num_cols':num_cols,
                         'objective':objective,
                         'time_solver':time_solver,
                         'heuristic':None,
-                        'groups':groups}
+                        'groups':groups,
+                        'mip_rel_gap':mip_rel_gap,
+                        'gap':gap}
             
         except CplexError as exc:
             print (exc)
 
         return solution
  
-    def runRMalphaPlus(self,lp_problem=False,debug=False,model_file=None):
+    def runRMalphaPlus(self,lp_problem=False,debug=False,model_file=None,
+                       mip_rel_gap=None,threads=None,time_limit=None):
         """Alpha Plus Model (RMalpha+)
 
         Creates the new model proposed as extension to the (RMalpha) proposed by Miyauchi and Sukegawa[1] and runs in CPLEX.
@@ -430,6 +326,9 @@ class RegnierProblem:
             lp_problem (bool,optional): If True run as Linear Programming instead of ILP.
             debug (bool,optional): Show debug information, mostly CPLEX output. 
             model_file (str,optional): Save the model to .lp format file.
+            mip_rel_gap (float,optional): Relative MIP gap tolerance, CPLEX default if None.
+            threads (int,optional): Number of threads used by CPLEX, CPLEX default if None.
+            time_limit (float,optional): Time limit of the solver in seconds, no limit if None.
 
         Returns:
             A Solution object.
@@ -437,12 +336,15 @@ class RegnierProblem:
         """
 
         heuristic = self.__findPositiveCut(debug=debug)
-        solution = self.runRMalpha(cut=heuristic['cut'],lp_problem=lp_problem,debug=debug,model_file=model_file)
+        solution = self.runRMalpha(cut=heuristic['cut'],lp_problem=lp_problem,debug=debug,model_file=model_file,
+                                   warmstart_groups=heuristic['groups'],
+                                   mip_rel_gap=mip_rel_gap,threads=threads,time_limit=time_limit)
         solution['heuristic']=heuristic
 
         return solution
 
-    def runRMbeta(self,cut=0,lp_problem=False,debug=False,model_file=None):
+    def runRMbeta(self,cut=0,lp_problem=False,debug=False,model_file=None,warmstart_groups=None,
+                  mip_rel_gap=None,threads=None,time_limit=None):
         """Beta Model (RMbeta0)
 
         Creates the Beta model proposed by Miyauchi and Sukegawa[1] and runs in CPLEX.
@@ -456,6 +358,10 @@ class RegnierProblem:
             lp_problem (bool,optional): If True run as Linear Programming instead of ILP.
             debug (bool,optional): Show debug information, mostly CPLEX output.
             model_file (str,optional): Save the model to .lp format file.
+            mip_rel_gap (float,optional): Relative MIP gap tolerance, CPLEX default if None.
+            threads (int,optional): Number of threads used by CPLEX, CPLEX default if None.
+            time_limit (float,optional): Time limit of the solver in seconds, no limit if None.
+            warmstart_groups (list of int,optional): A partition used as MIP start, ignored when lp_problem is True.
 
         Returns:
             A Solution object.
@@ -470,93 +376,30 @@ class RegnierProblem:
         ### MODELO CPLEX
         try:
 
-            # Create cplex instance
-            my_prob = cplex.Cplex()
-
-            if debug == False:
-                # Disable cplex output
-                my_prob.set_log_stream(None)
-                my_prob.set_error_stream(None)
-                my_prob.set_warning_stream(None)
-                my_prob.set_results_stream(None)
-
-            # Define it as a maximization problem
-            my_prob.objective.set_sense(my_prob.objective.sense.maximize)
-
-            # Variables matrix
-            X=[]
-            for i in range(self._n):
-                X.append([])
-                for j in range(self._n):
-                    X[i].append(0)
+            # Create cplex instance with the objective function
+            my_prob, X = self.__createProblem(lp_problem,debug,named=(model_file != None))
 
-            # Create Objective Function
-            if lp_problem==True:
-                for i in range(self._n):
-                    for j in range(i+1,self._n):
-                        var_name = "v."+str(i)+"."+str(j)
-                        X[i][j] = my_prob.variables.get_num()
-                        my_prob.variables.add(obj = [self._S[i][j]], 
-                                                     lb = [0], 
-                                                     ub = [1], 
-                                                     names = [var_name],
-                                                     types = [my_prob.variables.type.continuous] )
-            else:
-                for i in range(self._n):
-                    for j in range(i+1,self._n):
-                        var_name = "v."+str(i)+"."+str(j)
-                        X[i][j] = my_prob.variables.get_num()
-                        my_prob.variables.add(obj = [self._S[i][j]], 
-                                                     lb = [0], 
-                                                     ub = [1], 
-                                                     names = [var_name],
-                                                     types = [my_prob.variables.type.binary] )
+            # Solver parameters
+            self.__setParameters(my_prob,mip_rel_gap,threads,time_limit)
 
             # Insert Constraints
-            for i in range(self._n):
-                for j in range(i+1,self._n):
-                    for k in range(j+1,self._n):
-                        if (self._S[i][j] + self._S[j][k] >= cut):
-                            # Constraints
-                            # dij + djk  - dki <= 1
-                            the_vars  = []
-                            the_coefs = []
-                            the_vars.append(X[i][j])
-                            the_coefs.append(1)
-                            the_vars.append(X[j][k])
-                            the_coefs.append(1)
-                            the_vars.append(X[i][k])
-                            the_coefs.append(-1)
-                            my_prob.linear_constraints.add(lin_expr = \
-                                                           [cplex.SparsePair(the_vars, the_coefs)],
-                                                           senses = ["L"], rhs = [1])
-                        if (self._S[i][j] + self._S[i][k] >= cut):        
-                            # dij - djk  + dki <= 1
-                            the_vars  = []
-                            the_coefs = []
-                            the_vars.append(X[i][j])
-                            the_coefs.append(1)
-                            the_vars.append(X[j][k])
-                            the_coefs.append(-1)
-                            the_vars.append(X[i][k])
-                            the_coefs.append(1)
-                            my_prob.linear_constraints.add(lin_expr = \
-                                                           [cplex.SparsePair(the_vars, the_coefs)],
-                                                           senses = ["L"], rhs = [1])
-                        if (self._S[j][k] + self._S[i][k] >= cut):
-                            # -dij  + djk  + dki <= 1
-                            the_vars  = []
-                            the_coefs = []
-                            the_vars.append(X[i][j])
-                            the_coefs.append(-1)
-                            the_vars.append(X[j][k])
-                            the_coefs.append(1)
-                            the_vars.append(X[i][k])
-                            the_coefs.append(1)
-                            my_prob.linear_constraints.add(lin_expr = \
-                                                           [cplex.SparsePair(the_vars, the_coefs)],
-                                                           senses = ["L"], rhs = [1])
-   
+            constraints = []
+            S = self._S
+            for i,J,K in self.__triangles():
+                Sij = S[self.__pair(i,J)]
+                Sjk = S[self.__pair(J,K)]
+                Sik = S[self.__pair(i,K)]
+                masks = (Sij + Sjk >= cut,
+                         Sij + Sik >= cut,
+                         Sjk + Sik >= cut)
+                constraints.append(self.__triangleConstraints(X,i,J,K,masks))
+
+            self.__addConstraints(my_prob,constraints)
+
+            # Warm start
+            if warmstart_groups is not None and lp_problem==False:
+                self.__addMIPStart(my_prob,X,warmstart_groups)
+
             # Save model
             if(model_file != None):
                 my_prob.write(model_file)
@@ -579,46 +422,30 @@ class RegnierProblem:
             x = my_prob.solution.get_values()
 
             # Creating partition
-            groups = []
-            for i in range(self._n):
-                groups.append(-1)
-
-            groupID = 0
-            for i in range(self._n):
-                for j in range(i+1,self._n):
-                    index = X[i][j]
-                    if x[index] > 0:
-                        # Both objects don't have group, put then together on a new
-                        if groups[i] == -1 and groups[j] == -1:
-                            groups[i] = groupID
-                            groups[j] = groupID
-                            groupID = groupID + 1
-                        else:
-                            # If i object don't have group put him on j group
-                            if groups[i] == -1:
-                                groups[i] = groups[j]
-                            else:
-                                groups[j] = groups[i]
-
-            # The objects that remained alone create its own group
-            for i in range(len(groups)):
-                if groups[i] == -1:
-                    groups[i] = groupID
-                    groupID = groupID + 1
+            groups = self.__extractGroups(x,X)
+
+            # Relative gap tolerance used and gap achieved by the MIP solution
+            mip_rel_gap = my_prob.parameters.mip.tolerances.mipgap.get()
+            gap = None
+            if lp_problem==False:
+                gap = my_prob.solution.MIP.get_mip_relative_gap()
 
             solution = {'num_rows':num_rows,
                         'num_cols':num_cols,
                         'objective':objective,
                         'time_solver':time_solver,
                         'heuristic':None,
-                        'groups':groups}
+                        'groups':groups,
+                        'mip_rel_gap':mip_rel_gap,
+                        'gap':gap}
             
         except CplexError as exc:
             print (exc)
 
         return solution
             
-    def runRMbetaPlus(self,lp_problem=False,debug=False,model_file=None):
+    def runRMbetaPlus(self,lp_problem=False,debug=False,model_file=None,
+                      mip_rel_gap=None,threads=None,time_limit=None):
         """Beta Plus Model (RMbeta+)
 
         Creates the new model proposed as extension to the (RMbeta) proposed by Miyauchi and Sukegawa[1] and runs in CPLEX.
@@ -631,6 +458,9 @@ class RegnierProblem:
             lp_problem (bool,optional): If True run as Linear Programming instead of ILP.
             debug (bool,optional): Show debug information, mostly CPLEX output.
             model_file (str,optional): Save the model to .lp format file.
+            mip_rel_gap (float,optional): Relative MIP gap tolerance, CPLEX default if None.
+            threads (int,optional): Number of threads used by CPLEX, CPLEX default if None.
+            time_limit (float,optional): Time limit of the solver in seconds, no limit if None.
 
         Returns:
             A Solution object.
@@ -638,12 +468,15 @@ class RegnierProblem:
         """
 
         heuristic = self.__findPositiveCut(debug=debug)
-        solution = self.runRMbeta(cut=heuristic['cut'],lp_problem=lp_problem,debug=debug,model_file=model_file)
+        solution = self.runRMbeta(cut=heuristic['cut'],lp_problem=lp_problem,debug=debug,model_file=model_file,
+                                  warmstart_groups=heuristic['groups'],
+                                  mip_rel_gap=mip_rel_gap,threads=threads,time_limit=time_limit)
         solution['heuristic']=heuristic
 
         return solution
 
-    def runRMgamma(self,lp_problem=False,debug=False,model_file=None):
+    def runRMgamma(self,lp_problem=False,debug=False,model_file=None,
+                   mip_rel_gap=None,threads=None,time_limit=None):
         """Gamma Model (RMgamma)
 
         Creates the Gamma model that extend the models proposed by Miyauchi and Sukegawa[1] and runs in CPLEX.
@@ -656,6 +489,9 @@ class RegnierProblem:
             lp_problem (bool,optional): If True run as Linear Programming instead of ILP.
             debug (bool,optional): Show debug information, mostly CPLEX output.
             model_file (str,optional): Save the model to .lp format file.
+            mip_rel_gap (float,optional): Relative MIP gap tolerance, CPLEX default if None.
+            threads (int,optional): Number of threads used by CPLEX, CPLEX default if None.
+            time_limit (float,optional): Time limit of the solver in seconds, no limit if None.
 
         Returns:
             A Solution object.
@@ -672,92 +508,28 @@ class RegnierProblem:
         # Create IP Model
         ##############################
         try:
-            # Create cplex instance
-            my_prob = cplex.Cplex()
-
-            if not debug:
-                # Disable cplex output
-                my_prob.set_log_stream(None)
-                my_prob.set_error_stream(None)
-                my_prob.set_warning_stream(None)
-                my_prob.set_results_stream(None)
-            
-            # Define it as a maximization problem
-            my_prob.objective.set_sense(my_prob.objective.sense.maximize)
+            # Create cplex instance with the objective function
+            my_prob, X = self.__createProblem(lp_problem,debug,named=(model_file != None))
 
-            # Variables matrix
-            X=[]
-            for i in range(self._n):
-                X.append([])
-                for j in range(self._n):
-                    X[i].append(0)
+            # Solver parameters
+            self.__setParameters(my_prob,mip_rel_gap,threads,time_limit)
 
-            # Create Objective Function
-            if lp_problem==True:
-                for i in range(self._n):
-                    for j in range(i+1,self._n):
-                        var_name = "v."+str(i)+"."+str(j)
-                        X[i][j] = my_prob.variables.get_num()
-                        my_prob.variables.add(obj = [self._S[i][j]], 
-                                                     lb = [0], 
-                                                     ub = [1], 
-                                                     names = [var_name],
-                                                     types = [my_prob.variables.type.continuous] )
-            else:
-                for i in range(self._n):
-                    for j in range(i+1,self._n):
-                        var_name = "v."+str(i)+"."+str(j)
-                        X[i][j] = my_prob.variables.get_num()
-                        my_prob.variables.add(obj = [self._S[i][j]], 
-                                                     lb = [0], 
-                                                     ub = [1], 
-                                                     names = [var_name],
-                                                     types = [my_prob.variables.type.binary] )
-            
             # Insert Constraints
-            for i in range(self._n):
-                for j in range(i+1,self._n):
-                    for k in range(j+1,self._n):
-                        if (self._S[i][j] >= 0 and self._S[j][k] >= cut and self._S[i][k] <= 0):
-                            # Constraints
-                            # dij + djk  - dki <= 1
-                            the_vars  = []
-                            the_coefs = []
-                            the_vars.append(X[i][j])
-                            the_coefs.append(1)
-                            the_vars.append(X[j][k])
-                            the_coefs.append(1)
-                            the_vars.append(X[i][k])
-                            the_coefs.append(-1)
-                            my_prob.linear_constraints.add(lin_expr = \
-                                                           [cplex.SparsePair(the_vars, the_coefs)],
-                                                           senses = ["L"], rhs = [1])
-                        if (self._S[i][j] >= 0 and self._S[j][k] <= 0 and self._S[i][k] >= cut):
-                            # dij - djk  + dki <= 1
-                            the_vars  = []
-                            the_coefs = []
-                            the_vars.append(X[i][j])
-                            the_coefs.append(1)
-                            the_vars.append(X[j][k])
-                            the_coefs.append(-1)
-                            the_vars.append(X[i][k])
-                            the_coefs.append(1)
-                            my_prob.linear_constraints.add(lin_expr = \
-                                                           [cplex.SparsePair(the_vars, the_coefs)],
-                                                           senses = ["L"], rhs = [1])
-                        if (self._S[i][j] <= 0 and self._S[j][k] >= cut and self._S[i][k] >= 0):
-                            # -dij  + djk  + dki <= 1
-                            the_vars  = []
-                            the_coefs = []
-                            the_vars.append(X[i][j])
-                            the_coefs.append(-1)
-                            the_vars.append(X[j][k])
-                            the_coefs.append(1)
-                            the_vars.append(X[i][k])
-                            the_coefs.append(1)
-                            my_prob.linear_constraints.add(lin_expr = \
-                                                           [cplex.SparsePair(the_vars, the_coefs)],
-                                                           senses = ["L"], rhs = [1])
+            constraints = []
+            S = self._S
+            for i,J,K in self.__triangles():
+                Sij = S[self.__pair(i,J)]
+                Sjk = S[self.__pair(J,K)]
+                Sik = S[self.__pair(i,K)]
+                jk = Sjk >= cut
+                ik = Sik >= cut
+                ij_positive = Sij >= 0
+                masks = (ij_positive & jk & (Sik <= 0),
+                         ij_positive & (Sjk <= 0) & ik,
+                         (Sij <= 0) & jk & (Sik >= 0))
+                constraints.append(self.__triangleConstraints(X,i,J,K,masks))
+
+            self.__addConstraints(my_prob,constraints)
 
             # Save model
             if(model_file != None):
@@ -781,46 +553,448 @@ class RegnierProblem:
             x = my_prob.solution.get_values()
 
             # Creating partition
-            groups = []
-            for i in range(self._n):
-                groups.append(-1)
-
-            groupID = 0
-            for i in range(self._n):
-                for j in range(i+1,self._n):
-                    index = X[i][j]
-                    if x[index] > 0:
-                        # Both objects don't have group, put then together on a new
-                        if groups[i] == -1 and groups[j] == -1:
-                            groups[i] = groupID
-                            groups[j] = groupID
-                            groupID = groupID + 1
-                        else:
-                            # If i object don't have group put him on j group
-                            if groups[i] == -1:
-                                groups[i] = groups[j]
-                            else:
-                                groups[j] = groups[i]
-
-            # The objects that remained alone create its own group
-            for i in range(len(groups)):
-                if groups[i] == -1:
-                    groups[i] = groupID
-                    groupID = groupID + 1
-                        
+            groups = self.__extractGroups(x,X)
+
+            # Relative gap tolerance used and gap achieved by the MIP solution
+            mip_rel_gap = my_prob.parameters.mip.tolerances.mipgap.get()
+            gap = None
+            if lp_problem==False:
+                gap = my_prob.solution.MIP.get_mip_relative_gap()
+
             # Make solution object to return
             solution = {'num_rows':num_rows,
                         'num_cols':num_cols,
                         'objective':objective,
                         'time_solver':time_solver,
                         'heuristic':heuristic,
-                        'groups':groups}
+                        'groups':groups,
+                        'mip_rel_gap':mip_rel_gap,
+                        'gap':gap}
         
         except CplexError as exc:
             print (exc)
         
         return solution
 
+    def runAll(self,pool,lp_problem=False):
+        """Run all models
+
+        Creates and runs every model of the class in parallel, one task per model in the
+        given process pool. Each worker receives a copy of the instance, so the models are
+        built at the same time in separate processes.
+
+        The calls must be protected by "if __name__ == '__main__':" in the main script, since
+        on Windows the workers are spawned and import the script again.
+
+        Args:
+            pool (multiprocessing.Pool): The pool of processes that runs the models.
+            lp_problem (bool,optional): If True run as Linear Programming instead of ILP.
+
+        Returns:
+            A dictionary with the Solution object of each model, indexed by the method name.
+        
+        """
+
+        # Run the heuristics before copying the instance to the workers
+        self.__findPositiveCut()
+        self.__findNegativeCut()
+
+        methods = ['runRM','runRMalpha','runRMalphaPlus','runRMbeta','runRMbetaPlus','runRMgamma']
+        results = [pool.apply_async(getattr(self,method),kwds={'lp_problem':lp_problem}) for method in methods]
+
+        return dict(zip(methods,[result.get() for result in results]))
+
+    def __setParameters(self,my_prob,mip_rel_gap=None,threads=None,time_limit=None):
+        """Set the solver parameters.
+
+        Only the parameters given are changed, the others keep the CPLEX defaults.
+
+        Args:
+            my_prob (cplex.Cplex): The CPLEX problem instance.
+            mip_rel_gap (float,optional): Relative MIP gap tolerance.
+            threads (int,optional): Number of threads used by CPLEX.
+            time_limit (float,optional): Time limit of the solver in seconds.
+
+        Returns:
+            Nothing.
+        
+        """
+
+        if mip_rel_gap != None:
+            my_prob.parameters.mip.tolerances.mipgap.set(mip_rel_gap)
+
+        if threads != None:
+            my_prob.parameters.threads.set(threads)
+
+        if time_limit != None:
+            my_prob.parameters.timelimit.set(time_limit)
+
+    def __createProblem(self,lp_problem=False,debug=False,named=False):
+        """Create a CPLEX problem with the objective function.
+
+        The maximization problem with the model variables is created once, on the first call,
+        and each call returns a copy of it, so the variables are not added again for every model.
+
+        Args:
+            lp_problem (bool,optional): If True variables are continuous instead of binary.
+            debug (bool,optional): Show debug information, mostly CPLEX output.
+            named (bool,optional): If True name the variables "v.i.j", only needed to save the model.
+
+        Returns:
+            The new problem (cplex.Cplex) and its Variables matrix 'X' (numpy.ndarray).
+        
+        """
+
+        key = (lp_problem==True, named==True)
+        if key not in self._base_probs:
+            base_prob = cplex.Cplex()
+            base_prob.set_log_stream(None)
+            base_prob.set_error_stream(None)
+            base_prob.set_warning_stream(None)
+            base_prob.set_results_stream(None)
+
+            # Define it as a maximization problem
+            base_prob.objective.set_sense(base_prob.objective.sense.maximize)
+
+            # Create Objective Function
+            X = self.__addVariables(base_prob,lp_problem,named)
+            self._base_probs[key] = (base_prob,X)
+
+        base_prob, X = self._base_probs[key]
+        my_prob = cplex.Cplex(base_prob)
+
+        if not debug:
+            # Disable cplex output
+            my_prob.set_log_stream(None)
+            my_prob.set_error_stream(None)
+            my_prob.set_warning_stream(None)
+            my_prob.set_results_stream(None)
+
+        return my_prob, X
+
+    def __addVariables(self,my_prob,lp_problem=False,named=False):
+        """Create the model variables.
+
+        Adds one variable for each pair of instances (i,j), with i<j, using the similarity
+        between them as objective coefficient. All variables are added in a single call to CPLEX.
+
+        Args:
+            my_prob (cplex.Cplex): The CPLEX problem instance.
+            lp_problem (bool,optional): If True variables are continuous instead of binary.
+            named (bool,optional): If True name the variables "v.i.j", only needed to save the model.
+
+        Returns:
+            The Variables matrix 'X' (numpy.ndarray), where X[i,j] is the index of the variable of pair (i,j).
+        
+        """
+
+        if lp_problem==True:
+            var_type = my_prob.variables.type.continuous
+        else:
+            var_type = my_prob.variables.type.binary
+
+        # Variables matrix
+        I,J = np.triu_indices(self._n,1)
+        X = np.zeros((self._n,self._n),dtype=np.int64)
+        X[I,J] = my_prob.variables.get_num() + np.arange(len(I))
+
+        if named==True:
+            names = ["v."+str(i)+"."+str(j) for i,j in zip(I.tolist(),J.tolist())]
+        else:
+            names = None
+
+        my_prob.variables.add(obj = self._S.tolist(),
+                              lb = [0]*len(I),
+                              ub = [1]*len(I),
+                              names = names,
+                              types = [var_type]*len(I))
+
+        return X
+
+    def __pair(self,i,j):
+        """Pair index.
+
+        Position of the pair (i,j), with i<j, in the upper triangle stored in 'S'.
+
+        Args:
+            i (int or numpy.ndarray): The first instance.
+            j (int or numpy.ndarray): The second instance.
+
+        Returns:
+            The index (or index array) of the pair.
+        
+        """
+
+        return i*(2*self._n-i-1)//2 + (j-i-1)
+
+    def __unpair(self,pairs):
+        """Pairs instances.
+
+        Inverse of '__pair': the instances (i,j), with i<j, of positions in the upper triangle
+        of 'S' stored row by row.
+
+        Args:
+            pairs (numpy.ndarray): The positions of the pairs, in increasing order or not.
+
+        Returns:
+            The index arrays I and J of the first and second instances of the pairs.
+        
+        """
+
+        # The row of each pair is the last row starting at or before its position
+        instances = np.arange(self._n)
+        starts = self.__pair(instances,instances+1)
+        I = np.searchsorted(starts,pairs,side='right') - 1
+        J = pairs - starts[I] + I + 1
+        return I, J
+
+    def __triangles(self):
+        """Triangles enumeration.
+
+        Enumerates every triangle (i,j,k), with i<j<k, grouped by its first instance 'i' so
+        the arrays used to build the constraints stay with size O(n^2).
+
+        The pairs (j,k) with i<j<k are the end of the upper triangle, stored row by row, so
+        they are views of the index arrays of all pairs.
+
+        Returns:
+            A generator of (i,J,K), where J and K are the index arrays of the triangles of 'i'.
+        
+        """
+
+        I,J = np.triu_indices(self._n,1)
+        for i in range(self._n-2):
+            start = self.__pair(i+1,i+2)
+            yield i, I[start:], J[start:]
+
+    def __triangleConstraints(self,X,i,J,K,masks=None):
+        """Triangle constraints.
+
+        Creates, for each triangle (i,j,k), the constraints:
+
+             dij + djk - dik <= 1
+             dij - djk + dik <= 1
+            -dij + djk + dik <= 1
+
+        Args:
+            X (numpy.ndarray): The Variables matrix.
+            i (int): The first instance of the triangles.
+            J,K (numpy.ndarray): Index arrays of the other two instances of the triangles.
+            masks (tuple of numpy.ndarray,optional): Three boolean arrays selecting, for each triangle, 
+                which of the constraints above are created. If None all constraints are created.
+
+        Returns:
+            The arrays (vars, types) of the selected constraints, ordered by triangle, where
+            vars has the variables (dij, djk, dik) and types the number (0, 1 or 2) of the constraint.
+        
+        """
+
+        Xi = X[i]
+        the_vars = np.stack((Xi[J],X[J,K],Xi[K]),axis=1)
+
+        # Triangle and type of each selected constraint, in the order of the triangles
+        if masks is None:
+            triangles = np.repeat(np.arange(len(J)),3)
+            the_types = np.tile(np.arange(3,dtype=np.int8),len(J))
+        else:
+            triangles, the_types = np.nonzero(np.stack(masks,axis=1))
+
+        return the_vars[triangles], the_types
+
+    def __addConstraints(self,my_prob,constraints):
+        """Insert the triangle constraints.
+
+        Joins the constraints created by __triangleConstraints and adds them in a single call to CPLEX.
+
+        Args:
+            my_prob (cplex.Cplex): The CPLEX problem instance.
+            constraints (list of tuple): The (vars, types) arrays of each block of triangles.
+
+        Returns:
+            Nothing.
+        
+        """
+
+        if len(constraints) > 0:
+            the_vars = np.concatenate([v for v,t in constraints]).tolist()
+            the_types = np.concatenate([t for v,t in constraints]).tolist()
+        else:
+            the_vars = []
+            the_types = []
+
+        # Constraints in the [vars, coefs] format, sharing the three coefficient lists
+        the_coefs = ([1,1,-1],[1,-1,1],[-1,1,1])
+        lin_expr = [[v,the_coefs[t]] for v,t in zip(the_vars,the_types)]
+
+        my_prob.linear_constraints.add(lin_expr = lin_expr,
+                                       senses = "L"*len(lin_expr),
+                                       rhs = [1]*len(lin_expr))
+
+    def __addMIPStart(self,my_prob,X,groups):
+        """MIP start from a partition.
+
+        Gives CPLEX the solution where x[X[i,j]] = 1 if 'i' and 'j' are in the same group.
+        Every partition satisfies the triangle constraints, so the start is always feasible.
+        A partition that is not better than leaving every instance alone (objective 0) is skipped.
+
+        Args:
+            my_prob (cplex.Cplex): The CPLEX problem instance.
+            X (numpy.ndarray): The Variables matrix.
+            groups (list of int): The group of each instance.
+
+        Returns:
+            Nothing.
+        
+        """
+
+        groups = np.asarray(groups)
+        I,J = np.triu_indices(self._n,1)
+        together = groups[I] == groups[J]
+        if self._S[together].sum() <= 0:
+            return
+
+        values = together.astype(np.float64)
+        my_prob.MIP_starts.add(cplex.SparsePair(X[I,J].tolist(),values.tolist()),
+                               my_prob.MIP_starts.effort_level.check_feasibility)
+
+    def __components(self,I,J,roots=None):
+        """Connected components.
+
+        Finds the connected components of the graph with the instances as vertices and
+        the edges (I[e],J[e]). Each round hooks the root of every edge endpoint to the
+        smallest root of the edge and then compresses the paths, until no root changes.
+
+        Args:
+            I (numpy.ndarray): First instance of each edge.
+            J (numpy.ndarray): Second instance of each edge.
+            roots (numpy.ndarray,optional): Roots of components already found, returned by a previous
+                call, which are merged by the new edges. If None every instance starts alone.
+
+        Returns:
+            The root of the component of each instance (numpy.ndarray), which is its smallest instance.
+        
+        """
+
+        if roots is None:
+            roots = np.arange(self._n)
+        while True:
+            # Hook the roots to the smallest root of their edges
+            smallest = np.minimum(roots[I],roots[J])
+            hooked = roots.copy()
+            np.minimum.at(hooked,roots[I],smallest)
+            np.minimum.at(hooked,roots[J],smallest)
+
+            # Path compression, until every instance points to a root
+            while True:
+                jumped = hooked[hooked]
+                if (jumped == hooked).all():
+                    break
+                hooked = jumped
+
+            if (hooked == roots).all():
+                return roots
+            roots = hooked
+
+    def __extractGroups(self,x,X):
+        """Creating partition.
+
+        Recovers the groups of a solution: each pair (i,j) with x[X[i,j]] = 1 puts the
+        instances 'i' and 'j' in the same group, so the groups are the connected components
+        of the graph of these pairs.
+
+        Groups with more than one instance are numbered first, in the order of their first
+        instance, and the instances that remained alone create its own group afterwards.
+
+        Args:
+            x (list of float): The solution values.
+            X (numpy.ndarray): The Variables matrix.
+
+        Returns:
+            A list with the group of each instance.
+        
+        """
+
+        I,J = np.triu_indices(self._n,1)
+        together = np.asarray(x)[X[I,J]] > 0.5
+
+        # The root of each group is its first instance
+        roots = self.__components(I[together],J[together])
+
+        # Number the groups, the objects that remained alone come last
+        alone = np.bincount(roots,minlength=self._n)[roots] == 1
+        group_roots = np.unique(roots[~alone])
+        groups = np.empty(self._n,dtype=np.int64)
+        groups[~alone] = np.searchsorted(group_roots,roots[~alone])
+        groups[alone] = len(group_roots) + np.arange(np.count_nonzero(alone))
+
+        return groups.tolist()
+
+    def __bestCut(self,I,J,weights):
+        """Best cut of a graph.
+
+        Finds the largest cut such that the graph with the edges of weight >= cut is connected.
+        The edges are added from the largest weight to the smallest (reverse Kruskal), merging
+        the components of each weight into the ones already found, until the graph is connected.
+
+        Args:
+            I (numpy.ndarray): First instance of each edge.
+            J (numpy.ndarray): Second instance of each edge.
+            weights (numpy.ndarray): Weight of each edge.
+
+        Returns:
+            The best cut, 0 if the graph is never connected, and the roots of the components (numpy.ndarray)
+            of the graph with the edges of weight > cut.
+        
+        """
+
+        # An instance without edges of weight >= cut is alone, so the cut can not be larger than
+        # the smallest, among the instances, of the largest weight of their edges
+        degree = np.bincount(I,minlength=self._n) + np.bincount(J,minlength=self._n)
+        if (degree == 0).any():
+            return 0, self.__components(I[weights > 0],J[weights > 0])
+        largest = np.full(self._n,weights.min())
+        np.maximum.at(largest,I,weights)
+        np.maximum.at(largest,J,weights)
+        limit = largest.min()
+
+        order = np.argsort(-weights,kind='stable')
+        I = I[order]
+        J = J[order]
+        weights = weights[order]
+
+        # The edges above the limit are added at once, then the edges of each weight are
+        # the ranges between consecutive bounds
+        first = np.count_nonzero(weights > limit)
+        roots = self.__components(I[:first],J[:first])
+        bounds = np.concatenate(([first],first + np.flatnonzero(np.diff(weights[first:])) + 1,[len(weights)])).tolist()
+
+        for start,end in zip(bounds[:-1],bounds[1:]):
+            above = roots
+            roots = self.__components(I[start:end],J[start:end],roots)
+            if (roots == 0).all():
+                return int(weights[start]), above
+
+        return 0, self.__components(I[weights > 0],J[weights > 0])
+
+    def __printHeuristic(self,heuristic,name):
+        """Heuristic debug info.
+
+        Prints the times and the cut found by a heuristic.
+
+        Args:
+            heuristic (dict): The Heuristic object.
+            name (str): Name of the cut, "cut+" or "cut-".
+
+        Returns:
+            Nothing.
+        
+        """
+
+        print ("Time Graph Construction: %f"         %(heuristic['time_graph_construction']))
+        print ("Time Heuristic to find best cut: %f" %(heuristic['time_find_best_cut']))
+        print ("Total Time: %f"                      %(heuristic['time_total']))
+        print ("NEW (Best %s): %d"                   %(name,heuristic['cut']))
+
     def __findPositiveCut(self,debug=False):
         """Best positive cut heuristic.
 
@@ -831,58 +1005,63 @@ class RegnierProblem:
 
         Returns:
             A Heuristic object that contains all the relevant info about the heuristic.
+            The heuristic is computed once for each 'S', the next calls return a copy of the first result.
         
         """
 
-        time_total = time.time()
+        # Already computed for the same 'S'
+        key = ('+', hashlib.sha1(self._S.tobytes()).digest())
+        if key in self._heuristics:
+            heuristic = dict(self._heuristics[key])
+            heuristic['groups'] = list(heuristic['groups'])
+            # The debug info is printed for the cached heuristic too
+            if debug==True:
+                print ("################################")
+                print ("# Heuristic debug info")
+                print ("################################")
+                self.__printHeuristic(heuristic,"cut+")
+                print ("################################")
+            return heuristic
+
+        time_total = time.perf_counter()
         
         # Graph and unique set construction
-        time_graph_construction = time.time()
+        time_graph_construction = time.perf_counter()
 
-        graph_positive = Graph()
-        graph_positive.add_vertices(self._n)
-        unique_positive_weights = set()
-        for i in range(self._n):
-            for j in range (i+1,self._n):
-                if self._S[i][j] >= 0:
-                    graph_positive.add_edge(i,j,weight=self._S[i][j])
-                    unique_positive_weights.add(self._S[i][j])
+        # Only the selected pairs are converted to instances, without the index arrays of all pairs
+        pairs = np.flatnonzero(self._S >= 0)
+        I,J = self.__unpair(pairs)
+        weights = self._S[pairs]
         
-        time_graph_construction = time.time() - time_graph_construction
+        time_graph_construction = time.perf_counter() - time_graph_construction
 
-        # Sort unique weights and start heuristic to find the best cut value
-        time_find_best_cut = time.time()
+        # Start heuristic to find the best cut value
+        time_find_best_cut = time.perf_counter()
         
-        unique_positive_weights = sorted(unique_positive_weights)
+        best_positive_cut, roots = self.__bestCut(I,J,weights)
+
+        # The components of the graph with the edges above the best cut are the heuristic partition
+        groups = np.unique(roots,return_inverse=True)[1].ravel().tolist()
 
-        # Test different cuts and check connected
-        best_positive_cut = 0
-        for newCut in unique_positive_weights:
-            edges_to_delete = graph_positive.es.select(weight_lt=newCut)
-            graph_positive.delete_edges(edges_to_delete)
-            if graph_positive.is_connected():
-                best_positive_cut = newCut
-            else:
-                break
+        time_find_best_cut = time.perf_counter() - time_find_best_cut
+        time_total = time.perf_counter() - time_total
 
-        time_find_best_cut = time.time() - time_find_best_cut
-        time_total = time.time() - time_total
+        heuristic={}
+        heuristic['cut'] = best_positive_cut
+        heuristic['groups'] = groups
+        heuristic['time_total']=time_total
+        heuristic['time_graph_construction']=time_graph_construction
+        heuristic['time_find_best_cut']=time_find_best_cut
 
         if debug==True:
             print ("################################")
             print ("# Heuristic debug info")
             print ("################################")
-            print ("Time Graph Construction: %f"         %(time_graph_construction))
-            print ("Time Heuristic to find best cut: %f" %(time_find_best_cut))
-            print ("Total Time: %f"                      %(time_total))
-            print ("NEW (Best cut+): %d"                 %(best_positive_cut))
+            self.__printHeuristic(heuristic,"cut+")
             print ("################################")
 
-        heuristic={}
-        heuristic['cut'] = best_positive_cut
-        heuristic['time_total']=time_total
-        heuristic['time_graph_construction']=time_graph_construction
-        heuristic['time_find_best_cut']=time_find_best_cut
+        # The groups are a list, the cache keeps its own copy so the returned one can be changed
+        self._heuristics[key] = dict(heuristic, groups=list(groups))
 
         return heuristic
 
@@ -896,47 +1075,37 @@ class RegnierProblem:
 
         Returns:
             A Heuristic object that contains all the relevant info about the heuristic.
+            The heuristic is computed once for each 'S', the next calls return a copy of the first result.
         
         """
         
-        time_total = time.time()
+        # Already computed for the same 'S'
+        key = ('-', hashlib.sha1(self._S.tobytes()).digest())
+        if key in self._heuristics:
+            heuristic = dict(self._heuristics[key])
+            # The debug info is printed for the cached heuristic too
+            if debug==True:
+                self.__printHeuristic(heuristic,"cut-")
+            return heuristic
+
+        time_total = time.perf_counter()
 
         # Graph and unique set construction
-        time_graph_construction = time.time()
-
-        graph_negative = Graph()
-        graph_negative.add_vertices(self._n)
-        unique_negative_weights = set()
-        for i in range(self._n):
-            for j in range (i+1,self._n):
-                if self._S[i][j] <= 0:
-                    graph_negative.add_edge(i,j,weight=self._S[i][j])
-                    unique_negative_weights.add(self._S[i][j])
-        time_graph_construction = time.time() - time_graph_construction
-
-        # Sort unique weights and start heuristic to find the best cut value
-        time_find_best_cut = time.time()
-        
-        unique_negative_weights = sorted(unique_negative_weights)
-
-        # Test different cuts and check connected
-        best_negative_cut = 0
-        for newCut in unique_negative_weights:
-            edges_to_delete = graph_negative.es.select(weight_lt=newCut)
-            graph_negative.delete_edges(edges_to_delete)
-            if graph_negative.is_connected():
-                best_negative_cut = newCut
-            else:
-                break
-
-        time_find_best_cut = time.time() - time_find_best_cut
-        time_total = time.time() - time_total
+        time_graph_construction = time.perf_counter()
 
-        if debug==True:
-            print ("Time Graph Construction: %f"         %(time_graph_construction))
-            print ("Time Heuristic to find best cut: %f" %(time_find_best_cut))
-            print ("Total Time: %f"                      %(time_total))
-            print ("NEW (Best cut-): %d"                 %(best_negative_cut))
+        # Only the selected pairs are converted to instances, without the index arrays of all pairs
+        pairs = np.flatnonzero(self._S <= 0)
+        I,J = self.__unpair(pairs)
+        weights = self._S[pairs]
+        time_graph_construction = time.perf_counter() - time_graph_construction
+
+        # Start heuristic to find the best cut value
+        time_find_best_cut = time.perf_counter()
+        
+        best_negative_cut, roots = self.__bestCut(I,J,weights)
+
+        time_find_best_cut = time.perf_counter() - time_find_best_cut
+        time_total = time.perf_counter() - time_total
 
         heuristic={}
         heuristic['cut'] = best_negative_cut
@@ -944,4 +1113,9 @@ class RegnierProblem:
         heuristic['time_graph_construction']=time_graph_construction
         heuristic['time_find_best_cut']=time_find_best_cut
 
-        return heuristic
\ No newline at end of file
+        if debug==True:
+            self.__printHeuristic(heuristic,"cut-")
+
+        self._heuristics[key] = heuristic
+
+        return dict(heuristic)
\ No newline at end of file
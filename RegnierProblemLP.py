@@ -1,7 +1,8 @@
 #coding: utf-8
 import csv
+import hashlib
 import time
-from igraph import Graph
+import numpy as np
 
 class RegnierProblemLP:
 
@@ -10,7 +11,7 @@ class RegnierProblemLP:
     Clustering qualitative data through Integer Linear Programming.
 
     Attributes:
-        S (list of list of int): Similarity Matrix
+        S (numpy.ndarray of int): Similarity Matrix, only its upper triangle (i<j) stored row by row
         n (int): Number of instances
         m (int): Number of attributes
 
@@ -33,43 +34,64 @@ class RegnierProblemLP:
 
         """
         
-        self.__S=[]
-        self.__n=0
-        self.__m=0
-
         # Store dataset files in matrix 'D' and get 'n' and 'm' values
-        D=[]
         with open(dataset, 'r') as csvfile:
             spamreader = csv.reader(csvfile, delimiter=' ', quotechar='|')
-            for row in spamreader:
-                D.append([])
-                for v in row:
-                    D[self.__n].append(v)
-                    self.__m = self.__m + 1
-                self.__n = self.__n + 1
-            self.__m=self.__m//self.__n
-
-        # Create similarity matrix. Initializing it with -m-1 in the lower triangle of matrix 'S'
-        for i in range(self.__n):
-            self.__S.append([])
-            for j in range (self.__n):
-                self.__S[i].append(-self.__m -1)
+            rows = [row for row in spamreader]
+
+        # As in the first versions, 'm' is the number of values divided by 'n' and only the first
+        # 'm' values of each line are used, but never more values than the shortest line has, so
+        # the empty values of spaces at the end of some lines are ignored
+        m = min(sum(len(row) for row in rows)//len(rows), min(len(row) for row in rows))
+        D = np.array([row[:m] for row in rows])
+        self.__n, self.__m = D.shape
 
-        # Calculate the simetric difference between each instance and store it in 'S'. 
-        # The (-) negates the distance, transforming it into a similarity measure.
         # Missing values "?" are ignored in the similarity calculus.
-        for i in range(self.__n):
-            for j in range (self.__n):
-                if i != j:
-                    total = 0
-                    total_missing = 0
-                    for k in range(self.__m):
-                        if D[i][k] != "?" and D[j][k] != "?":
-                            if D[i][k] == D[j][k]:
-                                total = total + 1
-                        else:
-                            total_missing = total_missing + 1
-                    self.__S[i][j] = -((self.__m - total_missing) - 2*(total))
+        valid = (D != "?")
+
+        # Label encoding of each attribute, its values are numbered from 0 and the missing
+        # values are -1.
+        labels = [np.unique(D[valid[:,k],k], return_inverse=True) for k in range(self.__m)]
+        sizes = [len(values) for values,_ in labels]
+        C = np.full((self.__n, self.__m), -1, dtype=np.int64)
+        for k,(_,inverse) in enumerate(labels):
+            C[valid[:,k],k] = inverse.ravel()
+
+        # One-hot encoding of the codes, where each column of 'E' is one value of one attribute.
+        # The products (E E^T) and (V V^T) count, for each pair of instances, the attributes with
+        # equal values and the attributes present in both instances. The counts are exact in float32.
+        offsets = np.cumsum([0]+sizes)
+        rows, attributes = np.nonzero(valid)
+        E = np.zeros((self.__n, offsets[-1]), dtype=np.float32)
+        E[rows, offsets[attributes] + C[rows, attributes]] = 1
+        V = valid.astype(np.float32)
+        total = np.dot(E, E.T)
+        both_valid = np.dot(V, V.T)
+
+        # Calculate the simetric difference between each instance and store it in 'S'. 
+        # The distance is negated (2*total - both_valid), transforming it into a similarity measure.
+        # 'S' is symmetric and the models only use the pairs i<j, so only the upper
+        # triangle is kept, in the same order of the variables.
+        # The rows of the triangle are copied as slices, avoiding the index arrays of all pairs.
+        total *= 2
+        total -= both_valid
+        # The similarities are between -m and m, they are stored in the smallest integer type
+        # that also holds the sum of two of them, as done by the Beta models.
+        S_type = np.min_scalar_type(-2*max(self.__m,1)-1)
+        self.__S = np.concatenate([total[i,i+1:] for i in range(self.__n)]).astype(S_type)
+
+        # Sections of the LP files shared by all the models, formatted on their first use. The
+        # objective function only depends on 'S', the bounds and binaries only on 'n'.
+        self.__objective = None
+        self.__bounds = None
+        self.__binaries = None
+
+        # Name of the variable of each pair, created on the first constraints written
+        self.__names = None
+
+        # Results of the cut heuristics, computed on their first use. They only depend on 'S',
+        # so they are shared by all the models and indexed by a digest of its contents.
+        self.__heuristics = {}
     
     def saveRM(self,filename,lp_problem=False):
         """"Save Original Model (RM)
@@ -93,67 +115,22 @@ class RegnierProblemLP:
         f.write("\Problem name: RM model\n\n")
         f.write("Maximize\n")
         f.write(" obj: \n")
-        total = 0
-        for i in range(self.__n):
-            for j in range(i+1,self.__n):
-                if total == 4:
-                    if self.__S[i][j] >= 0:
-                        var_name = (" + " + str(abs(self.__S[i][j])) + " v."+str(i)+"."+str(j)+" \n")
-                        f.write("%s" % var_name)
-                    else:
-                        var_name = (" - " + str(abs(self.__S[i][j])) + " v."+str(i)+"."+str(j)+" \n")
-                        f.write("%s" % var_name)
-                    total = 0
-                else:
-                    if self.__S[i][j] >= 0:
-                        var_name = (" + " + str(abs(self.__S[i][j])) + " v."+str(i)+"."+str(j))
-                        f.write("%s" % var_name)
-                    else:
-                        var_name = (" - " + str(abs(self.__S[i][j])) + " v."+str(i)+"."+str(j))
-                        f.write("%s" % var_name)
-                total = total + 1
+        self.__writeObjective(f)
                 
         # Insert Constraints            
         f.write("\nSubject To\n")
         contraintID = 1
-        for i in range(self.__n):
-            for j in range(i+1,self.__n):
-                for k in range(j+1,self.__n):
-                    # dij + djk  - dik <= 1
-                    constraint = (" c" +str(contraintID) + ": v."+str(i)+"."+str(j)+" + v."+str(j)+"."+str(k)+" - v."+str(i)+"."+str(k)+" <= 1\n")
-                    f.write("%s" % constraint)
-                    contraintID = contraintID + 1
-                    # dij - djk  + dik <= 1
-                    constraint = (" c" +str(contraintID) + ": v."+str(i)+"."+str(j)+" - v."+str(j)+"."+str(k)+" + v."+str(i)+"."+str(k)+" <= 1\n")
-                    f.write("%s" % constraint)
-                    contraintID = contraintID + 1
-                    # -dij  + djk  + dik <= 1
-                    constraint = (" c" +str(contraintID) + ": - v."+str(i)+"."+str(j)+" + v."+str(j)+"."+str(k)+" + v."+str(i)+"."+str(k)+" <= 1\n")
-                    f.write("%s" % constraint)
-                    contraintID = contraintID + 1
+        for i,J,K in self.__triangles():
+            contraintID = self.__writeConstraints(f,contraintID,i,J,K)
 
         # Variables bounds
         f.write("\nBounds\n")
-        for i in range(self.__n):
-            for j in range(i+1,self.__n):
-                bounds = (" 0 <= v."+str(i)+"."+str(j)+" <= 1\n")
-                f.write("%s" % bounds)
+        self.__writeBounds(f)
 
         # If ILP define variables as binaries
         if(lp_problem==False):
             f.write("\nBinaries\n")
-            total = 0
-            var_name = ""
-            for i in range(self.__n):
-                for j in range(i+1,self.__n):
-                    total = total + 1
-                    if total == 4:
-                        var_name = var_name + (" v."+str(i)+"."+str(j)+"\n")
-                        f.write("%s" % var_name)
-                        total = 0
-                        var_name = ""
-                    else:
-                        var_name = var_name + (" v."+str(i)+"."+str(j))
+            self.__writeBinaries(f)
         f.write("End\n")
         f.close()
         print("Model file created.")
@@ -186,68 +163,24 @@ class RegnierProblemLP:
         f.write("\Problem name: RMalpha0 model\n\n")
         f.write("Maximize\n")
         f.write(" obj: \n")
-        total = 0
-        for i in range(self.__n):
-            for j in range(i+1,self.__n):
-                if total == 4:
-                    if self.__S[i][j] >= 0:
-                        var_name = (" + " + str(abs(self.__S[i][j])) + " v."+str(i)+"."+str(j)+" \n")
-                        f.write("%s" % var_name)
-                    else:
-                        var_name = (" - " + str(abs(self.__S[i][j])) + " v."+str(i)+"."+str(j)+" \n")
-                        f.write("%s" % var_name)
-                    total = 0
-                else:
-                    if self.__S[i][j] >= 0:
-                        var_name = (" + " + str(abs(self.__S[i][j])) + " v."+str(i)+"."+str(j))
-                        f.write("%s" % var_name)
-                    else:
-                        var_name = (" - " + str(abs(self.__S[i][j])) + " v."+str(i)+"."+str(j))
-                        f.write("%s" % var_name)
-                total = total + 1
+        self.__writeObjective(f)
                 
         # Insert Constraints            
         f.write("\nSubject To\n")
         contraintID = 1
-        for i in range(self.__n):
-            for j in range(i+1,self.__n):
-                for k in range(j+1,self.__n):
-                    # dij + djk  - dik <= 1
-                    if (self.__S[i][j] >= cut or self.__S[j][k] >= cut):
-                        constraint = (" c" +str(contraintID) + ": v."+str(i)+"."+str(j)+" + v."+str(j)+"."+str(k)+" - v."+str(i)+"."+str(k)+" <= 1\n")
-                        f.write("%s" % constraint)
-                        contraintID = contraintID + 1
-                    # dij - djk  + dik <= 1
-                    if (self.__S[i][j] >= cut or self.__S[i][k] >= cut):
-                        constraint = (" c" +str(contraintID) + ": v."+str(i)+"."+str(j)+" - v."+str(j)+"."+str(k)+" + v."+str(i)+"."+str(k)+" <= 1\n")
-                        f.write("%s" % constraint)
-                        contraintID = contraintID + 1
-                    # -dij  + djk  + dik <= 1
-                    if (self.__S[j][k] >= cut or self.__S[i][k] >= cut):
-                        constraint = (" c" +str(contraintID) + ": - v."+str(i)+"."+str(j)+" + v."+str(j)+"."+str(k)+" + v."+str(i)+"."+str(k)+" <= 1\n")
-                        f.write("%s" % constraint)
-                        contraintID = contraintID + 1
+        # Pairs with similarity above the cut, compared once for all the triangles
+        above = self.__S >= cut
+        for i,J,K in self.__triangles():
+            ij, jk, ik = self.__triangleValues(above,i,J,K)
+            masks = (ij | jk, ij | ik, jk | ik)
+            contraintID = self.__writeConstraints(f,contraintID,i,J,K,masks)
 
         f.write("Bounds\n")
-        for i in range(self.__n):
-            for j in range(i+1,self.__n):
-                bounds = (" 0 <= v."+str(i)+"."+str(j)+" <= 1\n")
-                f.write("%s" % bounds)
+        self.__writeBounds(f)
 
         if(lp_problem==False):
             f.write("Binaries\n")
-            total = 0
-            var_name = ""
-            for i in range(self.__n):
-                for j in range(i+1,self.__n):
-                    total = total + 1
-                    if total == 4:
-                        var_name = var_name + (" v."+str(i)+"."+str(j)+"\n")
-                        f.write("%s" % var_name)
-                        total = 0
-                        var_name = ""
-                    else:
-                        var_name = var_name + (" v."+str(i)+"."+str(j))
+            self.__writeBinaries(f)
         f.write("End\n")
         f.close()
         print("Model file created.")
@@ -282,68 +215,24 @@ class RegnierProblemLP:
         f.write("\Problem name: RMalpha+ model\n\n")
         f.write("Maximize\n")
         f.write(" obj: \n")
-        total = 0
-        for i in range(self.__n):
-            for j in range(i+1,self.__n):
-                if total == 4:
-                    if self.__S[i][j] >= 0:
-                        var_name = (" + " + str(abs(self.__S[i][j])) + " v."+str(i)+"."+str(j)+" \n")
-                        f.write("%s" % var_name)
-                    else:
-                        var_name = (" - " + str(abs(self.__S[i][j])) + " v."+str(i)+"."+str(j)+" \n")
-                        f.write("%s" % var_name)
-                    total = 0
-                else:
-                    if self.__S[i][j] >= 0:
-                        var_name = (" + " + str(abs(self.__S[i][j])) + " v."+str(i)+"."+str(j))
-                        f.write("%s" % var_name)
-                    else:
-                        var_name = (" - " + str(abs(self.__S[i][j])) + " v."+str(i)+"."+str(j))
-                        f.write("%s" % var_name)
-                total = total + 1
+        self.__writeObjective(f)
                 
         # Insert Constraints            
         f.write("\nSubject To\n")
         contraintID = 1
-        for i in range(self.__n):
-            for j in range(i+1,self.__n):
-                for k in range(j+1,self.__n):
-                    # dij + djk  - dik <= 1
-                    if (self.__S[i][j] >= cut or self.__S[j][k] >= cut):
-                        constraint = (" c" +str(contraintID) + ": v."+str(i)+"."+str(j)+" + v."+str(j)+"."+str(k)+" - v."+str(i)+"."+str(k)+" <= 1\n")
-                        f.write("%s" % constraint)
-                        contraintID = contraintID + 1
-                    # dij - djk  + dik <= 1
-                    if (self.__S[i][j] >= cut or self.__S[i][k] >= cut):
-                        constraint = (" c" +str(contraintID) + ": v."+str(i)+"."+str(j)+" - v."+str(j)+"."+str(k)+" + v."+str(i)+"."+str(k)+" <= 1\n")
-                        f.write("%s" % constraint)
-                        contraintID = contraintID + 1
-                    # -dij  + djk  + dik <= 1
-                    if (self.__S[j][k] >= cut or self.__S[i][k] >= cut):
-                        constraint = (" c" +str(contraintID) + ": - v."+str(i)+"."+str(j)+" + v."+str(j)+"."+str(k)+" + v."+str(i)+"."+str(k)+" <= 1\n")
-                        f.write("%s" % constraint)
-                        contraintID = contraintID + 1
+        # Pairs with similarity above the cut, compared once for all the triangles
+        above = self.__S >= cut
+        for i,J,K in self.__triangles():
+            ij, jk, ik = self.__triangleValues(above,i,J,K)
+            masks = (ij | jk, ij | ik, jk | ik)
+            contraintID = self.__writeConstraints(f,contraintID,i,J,K,masks)
 
         f.write("Bounds\n")
-        for i in range(self.__n):
-            for j in range(i+1,self.__n):
-                bounds = (" 0 <= v."+str(i)+"."+str(j)+" <= 1\n")
-                f.write("%s" % bounds)
+        self.__writeBounds(f)
 
         if(lp_problem==False):
             f.write("Binaries\n")
-            total = 0
-            var_name = ""
-            for i in range(self.__n):
-                for j in range(i+1,self.__n):
-                    total = total + 1
-                    if total == 4:
-                        var_name = var_name + (" v."+str(i)+"."+str(j)+"\n")
-                        f.write("%s" % var_name)
-                        total = 0
-                        var_name = ""
-                    else:
-                        var_name = var_name + (" v."+str(i)+"."+str(j))
+            self.__writeBinaries(f)
         f.write("End\n")
         f.close()
         print("Model file created.")
@@ -376,68 +265,22 @@ class RegnierProblemLP:
         f.write("\Problem name: RMbeta model\n\n")
         f.write("Maximize\n")
         f.write(" obj: \n")
-        total = 0
-        for i in range(self.__n):
-            for j in range(i+1,self.__n):
-                if total == 4:
-                    if self.__S[i][j] >= 0:
-                        var_name = (" + " + str(abs(self.__S[i][j])) + " v."+str(i)+"."+str(j)+" \n")
-                        f.write("%s" % var_name)
-                    else:
-                        var_name = (" - " + str(abs(self.__S[i][j])) + " v."+str(i)+"."+str(j)+" \n")
-                        f.write("%s" % var_name)
-                    total = 0
-                else:
-                    if self.__S[i][j] >= 0:
-                        var_name = (" + " + str(abs(self.__S[i][j])) + " v."+str(i)+"."+str(j))
-                        f.write("%s" % var_name)
-                    else:
-                        var_name = (" - " + str(abs(self.__S[i][j])) + " v."+str(i)+"."+str(j))
-                        f.write("%s" % var_name)
-                total = total + 1
+        self.__writeObjective(f)
                 
         # Insert Constraints            
         f.write("\nSubject To\n")
         contraintID = 1
-        for i in range(self.__n):
-            for j in range(i+1,self.__n):
-                for k in range(j+1,self.__n):
-                    # dij + djk  - dik <= 1
-                    if (self.__S[i][j] + self.__S[j][k] >= cut):
-                        constraint = (" c" +str(contraintID) + ": v."+str(i)+"."+str(j)+" + v."+str(j)+"."+str(k)+" - v."+str(i)+"."+str(k)+" <= 1\n")
-                        f.write("%s" % constraint)
-                        contraintID = contraintID + 1
-                    # dij - djk  + dik <= 1
-                    if (self.__S[i][j] + self.__S[i][k] >= cut):
-                        constraint = (" c" +str(contraintID) + ": v."+str(i)+"."+str(j)+" - v."+str(j)+"."+str(k)+" + v."+str(i)+"."+str(k)+" <= 1\n")
-                        f.write("%s" % constraint)
-                        contraintID = contraintID + 1
-                    # -dij  + djk  + dik <= 1
-                    if (self.__S[j][k] + self.__S[i][k] >= cut): 
-                        constraint = (" c" +str(contraintID) + ": - v."+str(i)+"."+str(j)+" + v."+str(j)+"."+str(k)+" + v."+str(i)+"."+str(k)+" <= 1\n")
-                        f.write("%s" % constraint)
-                        contraintID = contraintID + 1
+        for i,J,K in self.__triangles():
+            Sij, Sjk, Sik = self.__triangleValues(self.__S,i,J,K)
+            masks = (Sij + Sjk >= cut, Sij + Sik >= cut, Sjk + Sik >= cut)
+            contraintID = self.__writeConstraints(f,contraintID,i,J,K,masks)
 
         f.write("Bounds\n")
-        for i in range(self.__n):
-            for j in range(i+1,self.__n):
-                bounds = (" 0 <= v."+str(i)+"."+str(j)+" <= 1\n")
-                f.write("%s" % bounds)
+        self.__writeBounds(f)
 
         if(lp_problem==False):
             f.write("Binaries\n")
-            total = 0
-            var_name = ""
-            for i in range(self.__n):
-                for j in range(i+1,self.__n):
-                    total = total + 1
-                    if total == 4:
-                        var_name = var_name + (" v."+str(i)+"."+str(j)+"\n")
-                        f.write("%s" % var_name)
-                        total = 0
-                        var_name = ""
-                    else:
-                        var_name = var_name + (" v."+str(i)+"."+str(j))
+            self.__writeBinaries(f)
         f.write("End\n")
         f.close()
         print("Model file created.")
@@ -460,7 +303,7 @@ class RegnierProblemLP:
             Nothing.
         
         """
-        
+
         heuristic = self.__findPositiveCut(debug=debug)
         cut = heuristic['cut']
 
@@ -472,68 +315,22 @@ class RegnierProblemLP:
         f.write("\Problem name: RMbeta+ model\n\n")
         f.write("Maximize\n")
         f.write(" obj: \n")
-        total = 0
-        for i in range(self.__n):
-            for j in range(i+1,self.__n):
-                if total == 4:
-                    if self.__S[i][j] >= 0:
-                        var_name = (" + " + str(abs(self.__S[i][j])) + " v."+str(i)+"."+str(j)+" \n")
-                        f.write("%s" % var_name)
-                    else:
-                        var_name = (" - " + str(abs(self.__S[i][j])) + " v."+str(i)+"."+str(j)+" \n")
-                        f.write("%s" % var_name)
-                    total = 0
-                else:
-                    if self.__S[i][j] >= 0:
-                        var_name = (" + " + str(abs(self.__S[i][j])) + " v."+str(i)+"."+str(j))
-                        f.write("%s" % var_name)
-                    else:
-                        var_name = (" - " + str(abs(self.__S[i][j])) + " v."+str(i)+"."+str(j))
-                        f.write("%s" % var_name)
-                total = total + 1
+        self.__writeObjective(f)
                 
         # Insert Constraints            
         f.write("\nSubject To\n")
         contraintID = 1
-        for i in range(self.__n):
-            for j in range(i+1,self.__n):
-                for k in range(j+1,self.__n):
-                    # dij + djk  - dik <= 1
-                    if (self.__S[i][j] + self.__S[j][k] >= cut):
-                        constraint = (" c" +str(contraintID) + ": v."+str(i)+"."+str(j)+" + v."+str(j)+"."+str(k)+" - v."+str(i)+"."+str(k)+" <= 1\n")
-                        f.write("%s" % constraint)
-                        contraintID = contraintID + 1
-                    # dij - djk  + dik <= 1
-                    if (self.__S[i][j] + self.__S[i][k] >= cut):
-                        constraint = (" c" +str(contraintID) + ": v."+str(i)+"."+str(j)+" - v."+str(j)+"."+str(k)+" + v."+str(i)+"."+str(k)+" <= 1\n")
-                        f.write("%s" % constraint)
-                        contraintID = contraintID + 1
-                    # -dij  + djk  + dik <= 1
-                    if (self.__S[j][k] + self.__S[i][k] >= cut): 
-                        constraint = (" c" +str(contraintID) + ": - v."+str(i)+"."+str(j)+" + v."+str(j)+"."+str(k)+" + v."+str(i)+"."+str(k)+" <= 1\n")
-                        f.write("%s" % constraint)
-                        contraintID = contraintID + 1
+        for i,J,K in self.__triangles():
+            Sij, Sjk, Sik = self.__triangleValues(self.__S,i,J,K)
+            masks = (Sij + Sjk >= cut, Sij + Sik >= cut, Sjk + Sik >= cut)
+            contraintID = self.__writeConstraints(f,contraintID,i,J,K,masks)
 
         f.write("Bounds\n")
-        for i in range(self.__n):
-            for j in range(i+1,self.__n):
-                bounds = (" 0 <= v."+str(i)+"."+str(j)+" <= 1\n")
-                f.write("%s" % bounds)
+        self.__writeBounds(f)
 
         if(lp_problem==False):
             f.write("Binaries\n")
-            total = 0
-            var_name = ""
-            for i in range(self.__n):
-                for j in range(i+1,self.__n):
-                    total = total + 1
-                    if total == 4:
-                        var_name = var_name + (" v."+str(i)+"."+str(j)+"\n")
-                        f.write("%s" % var_name)
-                        total = 0
-                        var_name = ""
-                    else:
-                        var_name = var_name + (" v."+str(i)+"."+str(j))
+            self.__writeBinaries(f)
         f.write("End\n")
         f.close()
         print("Model file created.")
@@ -569,72 +366,392 @@ class RegnierProblemLP:
         f.write("\Problem name: RMgamma model\n\n")
         f.write("Maximize\n")
         f.write(" obj: \n")
-        total = 0
-        for i in range(self.__n):
-            for j in range(i+1,self.__n):
-                if total == 4:
-                    if self.__S[i][j] >= 0:
-                        var_name = (" + " + str(abs(self.__S[i][j])) + " v."+str(i)+"."+str(j)+" \n")
-                        f.write("%s" % var_name)
-                    else:
-                        var_name = (" - " + str(abs(self.__S[i][j])) + " v."+str(i)+"."+str(j)+" \n")
-                        f.write("%s" % var_name)
-                    total = 0
-                else:
-                    if self.__S[i][j] >= 0:
-                        var_name = (" + " + str(abs(self.__S[i][j])) + " v."+str(i)+"."+str(j))
-                        f.write("%s" % var_name)
-                    else:
-                        var_name = (" - " + str(abs(self.__S[i][j])) + " v."+str(i)+"."+str(j))
-                        f.write("%s" % var_name)
-                total = total + 1
+        self.__writeObjective(f)
                 
         # Insert Constraints            
         f.write("\nSubject To\n")
         contraintID = 1
-        for i in range(self.__n):
-            for j in range(i+1,self.__n):
-                for k in range(j+1,self.__n):
-                    # dij + djk  - dik <= 1
-                    if (self.__S[i][j] >= 0 and self.__S[j][k] >= gamma and self.__S[i][k] <= 0):
-                        constraint = (" c" +str(contraintID) + ": v."+str(i)+"."+str(j)+" + v."+str(j)+"."+str(k)+" - v."+str(i)+"."+str(k)+" <= 1\n")
-                        f.write("%s" % constraint)
-                        contraintID = contraintID + 1
-                    # dij - djk  + dik <= 1
-                    if (self.__S[i][j] >= 0 and self.__S[j][k] <= 0 and self.__S[i][k] >= gamma):
-                        constraint = (" c" +str(contraintID) + ": v."+str(i)+"."+str(j)+" - v."+str(j)+"."+str(k)+" + v."+str(i)+"."+str(k)+" <= 1\n")
-                        f.write("%s" % constraint)
-                        contraintID = contraintID + 1
-                    # -dij  + djk  + dik <= 1
-                    if (self.__S[i][j] <= 0 and self.__S[j][k] >= gamma and self.__S[i][k] >= 0):
-                        constraint = (" c" +str(contraintID) + ": - v."+str(i)+"."+str(j)+" + v."+str(j)+"."+str(k)+" + v."+str(i)+"."+str(k)+" <= 1\n")
-                        f.write("%s" % constraint)
-                        contraintID = contraintID + 1
+        for i,J,K in self.__triangles():
+            Sij, Sjk, Sik = self.__triangleValues(self.__S,i,J,K)
+            ij_positive = Sij >= 0
+            jk = Sjk >= gamma
+            ik = Sik >= gamma
+            masks = (ij_positive & jk & (Sik <= 0),
+                     ij_positive & (Sjk <= 0) & ik,
+                     (Sij <= 0) & jk & (Sik >= 0))
+            contraintID = self.__writeConstraints(f,contraintID,i,J,K,masks)
 
         f.write("Bounds\n")
-        for i in range(self.__n):
-            for j in range(i+1,self.__n):
-                bounds = (" 0 <= v."+str(i)+"."+str(j)+" <= 1\n")
-                f.write("%s" % bounds)
+        self.__writeBounds(f)
 
         if(lp_problem==False):
             f.write("Binaries\n")
-            total = 0
-            var_name = ""
-            for i in range(self.__n):
-                for j in range(i+1,self.__n):
-                    total = total + 1
-                    if total == 4:
-                        var_name = var_name + (" v."+str(i)+"."+str(j)+"\n")
-                        f.write("%s" % var_name)
-                        total = 0
-                        var_name = ""
-                    else:
-                        var_name = var_name + (" v."+str(i)+"."+str(j))
+            self.__writeBinaries(f)
         f.write("End\n")
         f.close()
         print("Model file created.")
 
+    def saveAll(self,pool,filename,lp_problem=False):
+        """Save all models
+
+        Saves every model of the class in parallel, one task per model in the given process
+        pool. Each worker receives a copy of the instance and writes its own LP file, so the
+        files are created at the same time in separate processes.
+
+        The calls must be protected by "if __name__ == '__main__':" in the main script, since
+        on Windows the workers are spawned and import the script again.
+
+        Args:
+            pool (multiprocessing.Pool): The pool of processes that saves the models.
+            filename (str): The path to save the LP files, each model adds its own suffix.
+            lp_problem (bool,optional): If True save them as Linear Programming instead of ILP.
+
+        Returns:
+            Nothing.
+        
+        """
+
+        # Run the heuristics before copying the instance to the workers
+        self.__findPositiveCut()
+        self.__findNegativeCut()
+
+        methods = ['saveRM','saveRMalpha','saveRMalphaPlus','saveRMbeta','saveRMbetaPlus','saveRMgamma']
+        results = [pool.apply_async(getattr(self,method),(filename,),{'lp_problem':lp_problem}) for method in methods]
+
+        # Wait for every file, raising the errors of the workers
+        for result in results:
+            result.get()
+
+    def __writeObjective(self,f):
+        """Write objective function.
+
+        Writes the similarity of every pair (i,j), with i<j, as the coefficient of 'v.i.j', breaking
+        the line after every fourth term. The text is formatted once and reused by the next files.
+
+        Args:
+            f (file): The LP file.
+
+        Returns:
+            Nothing.
+        
+        """
+
+        if self.__objective is None:
+            I,J = np.triu_indices(self.__n,1)
+            C = self.__S
+
+            # Sign of each coefficient and whether its term ends a line (after the 4th, 8th, ... term)
+            breaks = np.arange(len(C)) % 4 == 0
+            breaks[:1] = False
+            the_types = (C < 0) + 2*breaks
+
+            templates = (" + %d v.%d.%d",
+                         " - %d v.%d.%d",
+                         " + %d v.%d.%d \n",
+                         " - %d v.%d.%d \n")
+            terms = [templates[t] % (c,i,j) for t,c,i,j in zip(the_types.tolist(),
+                                                              np.abs(C).tolist(),
+                                                              I.tolist(),
+                                                              J.tolist())]
+            self.__objective = "".join(terms)
+
+        f.write(self.__objective)
+
+    def __writeBounds(self,f):
+        """Write variables bounds.
+
+        Writes the bounds 0 <= v.i.j <= 1 of every variable, one per line. The text is formatted
+        once and reused by the next files.
+
+        Args:
+            f (file): The LP file.
+
+        Returns:
+            Nothing.
+        
+        """
+
+        if self.__bounds is None:
+            I,J = np.triu_indices(self.__n,1)
+            pairs = np.stack((I,J),axis=1)
+
+            template = " 0 <= v.%d.%d <= 1\n"
+            self.__bounds = (template*len(I)) % tuple(pairs.ravel().tolist())
+
+        f.write(self.__bounds)
+
+    def __writeBinaries(self,f):
+        """Write binary variables.
+
+        Writes the names of the variables 'v.i.j', four per line. As in the first versions of the
+        LP files, the names after the last complete line are not written. The text is formatted
+        once and reused by the next files.
+
+        Args:
+            f (file): The LP file.
+
+        Returns:
+            Nothing.
+        
+        """
+
+        if self.__binaries is None:
+            # The pairs of the complete lines, four pairs (i,j) per line
+            I,J = np.triu_indices(self.__n,1)
+            size = len(I)//4*4
+            pairs = np.stack((I[:size],J[:size]),axis=1)
+
+            template = " v.%d.%d v.%d.%d v.%d.%d v.%d.%d\n"
+            self.__binaries = (template*(size//4)) % tuple(pairs.ravel().tolist())
+
+        f.write(self.__binaries)
+
+    def __pair(self,i,j):
+        """Pair index.
+
+        Position of the pair (i,j), with i<j, in the upper triangle of 'S' stored row by row.
+
+        Args:
+            i (int or numpy.ndarray): The first instance.
+            j (int or numpy.ndarray): The second instance.
+
+        Returns:
+            The index (or index array) of the pair.
+        
+        """
+
+        return i*(2*self.__n-i-1)//2 + (j-i-1)
+
+    def __unpair(self,pairs):
+        """Pairs instances.
+
+        Inverse of '__pair': the instances (i,j), with i<j, of positions in the upper triangle
+        of 'S' stored row by row.
+
+        Args:
+            pairs (numpy.ndarray): The positions of the pairs, in increasing order or not.
+
+        Returns:
+            The index arrays I and J of the first and second instances of the pairs.
+        
+        """
+
+        # The row of each pair is the last row starting at or before its position
+        instances = np.arange(self.__n)
+        starts = self.__pair(instances,instances+1)
+        I = np.searchsorted(starts,pairs,side='right') - 1
+        J = pairs - starts[I] + I + 1
+        return I, J
+
+    def __triangles(self):
+        """Triangles enumeration.
+
+        Enumerates every triangle (i,j,k), with i<j<k, grouped by its first instance 'i' so
+        the arrays used to select the constraints stay with size O(n^2).
+
+        The pairs (j,k) with i<j<k are the end of the upper triangle, stored row by row, so
+        they are views of the index arrays of all pairs.
+
+        Returns:
+            A generator of (i,J,K), where J and K are the index arrays of the triangles of 'i'.
+        
+        """
+
+        I,J = np.triu_indices(self.__n,1)
+        for i in range(self.__n-2):
+            start = self.__pair(i+1,i+2)
+            yield i, I[start:], J[start:]
+
+    def __triangleValues(self,values,i,J,K):
+        """Values of the pairs of the triangles.
+
+        Selects, from an array with one value for each pair, like 'S', the values of the pairs
+        (i,j), (j,k) and (i,k) of the triangles of 'i'.
+
+        The pairs (i,j) with j>i are the row 'i' of the upper triangle, and the pairs (j,k) of
+        the triangles of 'i' are its end, so only (i,j) and (i,k) are gathered.
+
+        Args:
+            values (numpy.ndarray): One value for each pair (i,j), with i<j, stored row by row.
+            i (int): The first instance of the triangles.
+            J,K (numpy.ndarray): Index arrays of the other two instances of the triangles.
+
+        Returns:
+            The arrays with the values of (i,j), (j,k) and (i,k) of each triangle.
+        
+        """
+
+        start = self.__pair(i,i+1)
+        row = values[start:start+self.__n-i-1]
+        return row[J-i-1], values[len(values)-len(J):], row[K-i-1]
+
+    def __variableNames(self):
+        """Variables names.
+
+        Names of the variables, created once so the constraints do not convert the
+        instances of every variable to text again.
+
+        Returns:
+            The name 'v.i.j' of the variable of each pair (i,j), with i<j, stored row by row (numpy.ndarray of str).
+        
+        """
+
+        if self.__names is None:
+            I,J = np.triu_indices(self.__n,1)
+            self.__names = np.array(["v.%d.%d" % (i,j) for i,j in zip(I.tolist(),J.tolist())],dtype=object)
+
+        return self.__names
+
+    def __writeConstraints(self,f,contraintID,i,J,K,masks=None):
+        """Write triangle constraints.
+
+        Writes, for each triangle (i,j,k), the constraints:
+
+             dij + djk - dik <= 1
+             dij - djk + dik <= 1
+            -dij + djk + dik <= 1
+
+        Args:
+            f (file): The LP file.
+            contraintID (int): The number of the first constraint written.
+            i (int): The first instance of the triangles.
+            J,K (numpy.ndarray): Index arrays of the other two instances of the triangles.
+            masks (tuple of numpy.ndarray,optional): Three boolean arrays selecting, for each triangle,
+                which of the constraints above are written. If None all constraints are written.
+
+        Returns:
+            The number of the next constraint.
+        
+        """
+
+        # Triangle and type of each selected constraint, in the order of the triangles
+        if masks is None:
+            triangles = np.repeat(np.arange(len(J)),3)
+            the_types = np.tile(np.arange(3),len(J))
+        else:
+            triangles, the_types = np.nonzero(np.stack(masks,axis=1))
+
+        templates = (" c%d: %s + %s - %s <= 1\n",
+                     " c%d: %s - %s + %s <= 1\n",
+                     " c%d: - %s + %s + %s <= 1\n")
+
+        # Names of the variables (i,j), (j,k) and (i,k) of each triangle
+        ij, jk, ik = self.__triangleValues(self.__variableNames(),i,J,K)
+
+        # The templates of all constraints are joined and formatted by a single %, so no
+        # string is created for each constraint. Each row of 'values' fills one template.
+        the_template = "".join([templates[t] for t in the_types.tolist()])
+        values = np.empty((len(triangles),4),dtype=object)
+        values[:,0] = range(contraintID,contraintID+len(triangles))
+        values[:,1] = ij[triangles]
+        values[:,2] = jk[triangles]
+        values[:,3] = ik[triangles]
+        f.write(the_template % tuple(values.ravel().tolist()))
+
+        return contraintID + len(triangles)
+
+    def __components(self,I,J,roots=None):
+        """Connected components.
+
+        Finds the connected components of the graph with the instances as vertices and
+        the edges (I[e],J[e]). Each round hooks the root of every edge endpoint to the
+        smallest root of the edge and then compresses the paths, until no root changes.
+
+        Args:
+            I (numpy.ndarray): First instance of each edge.
+            J (numpy.ndarray): Second instance of each edge.
+            roots (numpy.ndarray,optional): Roots of components already found, returned by a previous
+                call, which are merged by the new edges. If None every instance starts alone.
+
+        Returns:
+            The root of the component of each instance (numpy.ndarray), which is its smallest instance.
+        
+        """
+
+        if roots is None:
+            roots = np.arange(self.__n)
+        while True:
+            # Hook the roots to the smallest root of their edges
+            smallest = np.minimum(roots[I],roots[J])
+            hooked = roots.copy()
+            np.minimum.at(hooked,roots[I],smallest)
+            np.minimum.at(hooked,roots[J],smallest)
+
+            # Path compression, until every instance points to a root
+            while True:
+                jumped = hooked[hooked]
+                if (jumped == hooked).all():
+                    break
+                hooked = jumped
+
+            if (hooked == roots).all():
+                return roots
+            roots = hooked
+
+    def __bestCut(self,I,J,weights):
+        """Best cut of a graph.
+
+        Finds the largest cut such that the graph with the edges of weight >= cut is connected.
+        The edges are added from the largest weight to the smallest (reverse Kruskal), merging
+        the components of each weight into the ones already found, until the graph is connected.
+
+        Args:
+            I (numpy.ndarray): First instance of each edge.
+            J (numpy.ndarray): Second instance of each edge.
+            weights (numpy.ndarray): Weight of each edge.
+
+        Returns:
+            The best cut, 0 if the graph is never connected.
+        
+        """
+
+        # An instance without edges of weight >= cut is alone, so the cut can not be larger than
+        # the smallest, among the instances, of the largest weight of their edges
+        degree = np.bincount(I,minlength=self.__n) + np.bincount(J,minlength=self.__n)
+        if (degree == 0).any():
+            return 0
+        largest = np.full(self.__n,weights.min())
+        np.maximum.at(largest,I,weights)
+        np.maximum.at(largest,J,weights)
+        limit = largest.min()
+
+        order = np.argsort(-weights,kind='stable')
+        I = I[order]
+        J = J[order]
+        weights = weights[order]
+
+        # The edges above the limit are added at once, then the edges of each weight are
+        # the ranges between consecutive bounds
+        first = np.count_nonzero(weights > limit)
+        roots = self.__components(I[:first],J[:first])
+        bounds = np.concatenate(([first],first + np.flatnonzero(np.diff(weights[first:])) + 1,[len(weights)])).tolist()
+
+        for start,end in zip(bounds[:-1],bounds[1:]):
+            roots = self.__components(I[start:end],J[start:end],roots)
+            if (roots == 0).all():
+                return int(weights[start])
+
+        return 0
+
+    def __printHeuristic(self,heuristic,name):
+        """Heuristic debug info.
+
+        Prints the times and the cut found by a heuristic.
+
+        Args:
+            heuristic (dict): The Heuristic object.
+            name (str): Name of the cut, "cut+" or "cut-".
+
+        Returns:
+            Nothing.
+        
+        """
+
+        print ("Time Graph Construction: %f"         %(heuristic['time_graph_construction']))
+        print ("Time Heuristic to find best cut: %f" %(heuristic['time_find_best_cut']))
+        print ("Total Time: %f"                      %(heuristic['time_total']))
+        print ("NEW (Best %s): %d"                   %(name,heuristic['cut']))
+
     def __findPositiveCut(self,debug=False):
         """Best positive cut heuristic.
 
@@ -645,60 +762,59 @@ class RegnierProblemLP:
 
         Returns:
             A Heuristic object that contains all the relevant info about the heuristic.
+            The heuristic is computed once for each 'S', the next calls return a copy of the first result.
         
         """
 
-        time_total = time.time()
+        # Already computed for the same 'S'
+        key = ('+', hashlib.sha1(self.__S.tobytes()).digest())
+        if key in self.__heuristics:
+            heuristic = dict(self.__heuristics[key])
+            # The debug info is printed for the cached heuristic too
+            if debug==True:
+                print ("################################")
+                print ("# Heuristic debug info")
+                print ("################################")
+                self.__printHeuristic(heuristic,"cut+")
+                print ("################################")
+            return heuristic
+
+        time_total = time.perf_counter()
         
         # Graph and unique set construction
-        time_graph_construction = time.time()
-
-        graph_positive = Graph()
-        graph_positive.add_vertices(self.__n)
-        unique_positive_weights = set()
-        for i in range(self.__n):
-            for j in range (i+1,self.__n):
-                if self.__S[i][j] >= 0:
-                    graph_positive.add_edge(i,j,weight=self.__S[i][j])
-                    unique_positive_weights.add(self.__S[i][j])
+        time_graph_construction = time.perf_counter()
+
+        # Only the selected pairs are converted to instances, without the index arrays of all pairs
+        pairs = np.flatnonzero(self.__S >= 0)
+        I,J = self.__unpair(pairs)
+        weights = self.__S[pairs]
         
-        time_graph_construction = time.time() - time_graph_construction
+        time_graph_construction = time.perf_counter() - time_graph_construction
 
-        # Sort unique weights and start heuristic to find the best cut value
-        time_find_best_cut = time.time()
+        # Start heuristic to find the best cut value
+        time_find_best_cut = time.perf_counter()
         
-        unique_positive_weights = sorted(unique_positive_weights)
+        best_positive_cut = self.__bestCut(I,J,weights)
 
-        # Test different cuts and check connected
-        best_positive_cut = 0
-        for newCut in unique_positive_weights:
-            edges_to_delete = graph_positive.es.select(weight_lt=newCut)
-            graph_positive.delete_edges(edges_to_delete)
-            if graph_positive.is_connected():
-                best_positive_cut = newCut
-            else:
-                break
+        time_find_best_cut = time.perf_counter() - time_find_best_cut
+        time_total = time.perf_counter() - time_total
 
-        time_find_best_cut = time.time() - time_find_best_cut
-        time_total = time.time() - time_total
+        heuristic={}
+        heuristic['cut'] = best_positive_cut
+        heuristic['time_total']=time_total
+        heuristic['time_graph_construction']=time_graph_construction
+        heuristic['time_find_best_cut']=time_find_best_cut
 
         if debug==True:
             print ("################################")
             print ("# Heuristic debug info")
             print ("################################")
-            print ("Time Graph Construction: %f"         %(time_graph_construction))
-            print ("Time Heuristic to find best cut: %f" %(time_find_best_cut))
-            print ("Total Time: %f"                      %(time_total))
-            print ("NEW (Best cut+): %d"                 %(best_positive_cut))
+            self.__printHeuristic(heuristic,"cut+")
             print ("################################")
 
-        heuristic={}
-        heuristic['cut'] = best_positive_cut
-        heuristic['time_total']=time_total
-        heuristic['time_graph_construction']=time_graph_construction
-        heuristic['time_find_best_cut']=time_find_best_cut
+        self.__heuristics[key] = heuristic
 
-        return heuristic     
+        return dict(heuristic)
 
     def __findNegativeCut(self,debug=False):
         """Best negative cut heuristic.
@@ -710,47 +826,37 @@ class RegnierProblemLP:
 
         Returns:
             A Heuristic object that contains all the relevant info about the heuristic.
+            The heuristic is computed once for each 'S', the next calls return a copy of the first result.
         
         """
-        
-        time_total = time.time()
+
+        # Already computed for the same 'S'
+        key = ('-', hashlib.sha1(self.__S.tobytes()).digest())
+        if key in self.__heuristics:
+            heuristic = dict(self.__heuristics[key])
+            # The debug info is printed for the cached heuristic too
+            if debug==True:
+                self.__printHeuristic(heuristic,"cut-")
+            return heuristic
+
+        time_total = time.perf_counter()
 
         # Graph and unique set construction
-        time_graph_construction = time.time()
-
-        graph_negative = Graph()
-        graph_negative.add_vertices(self.__n)
-        unique_negative_weights = set()
-        for i in range(self.__n):
-            for j in range (i+1,self.__n):
-                if self.__S[i][j] <= 0:
-                    graph_negative.add_edge(i,j,weight=self.__S[i][j])
-                    unique_negative_weights.add(self.__S[i][j])
-        time_graph_construction = time.time() - time_graph_construction
-
-        # Sort unique weights and start heuristic to find the best cut value
-        time_find_best_cut = time.time()
-        
-        unique_negative_weights = sorted(unique_negative_weights)
+        time_graph_construction = time.perf_counter()
 
-        # Test different cuts and check connected
-        best_negative_cut = 0
-        for newCut in unique_negative_weights:
-            edges_to_delete = graph_negative.es.select(weight_lt=newCut)
-            graph_negative.delete_edges(edges_to_delete)
-            if graph_negative.is_connected():
-                best_negative_cut = newCut
-            else:
-                break
+        # Only the selected pairs are converted to instances, without the index arrays of all pairs
+        pairs = np.flatnonzero(self.__S <= 0)
+        I,J = self.__unpair(pairs)
+        weights = self.__S[pairs]
+        time_graph_construction = time.perf_counter() - time_graph_construction
 
-        time_find_best_cut = time.time() - time_find_best_cut
-        time_total = time.time() - time_total
+        # Start heuristic to find the best cut value
+        time_find_best_cut = time.perf_counter()
+        
+        best_negative_cut = self.__bestCut(I,J,weights)
 
-        if debug==True:
-            print ("Time Graph Construction: %f"         %(time_graph_construction))
-            print ("Time Heuristic to find best cut: %f" %(time_find_best_cut))
-            print ("Total Time: %f"                      %(time_total))
-            print ("NEW (Best cut-): %d"                 %(best_negative_cut))
+        time_find_best_cut = time.perf_counter() - time_find_best_cut
+        time_total = time.perf_counter() - time_total
 
         heuristic={}
         heuristic['cut'] = best_negative_cut
@@ -758,4 +864,9 @@ class RegnierProblemLP:
         heuristic['time_graph_construction']=time_graph_construction
         heuristic['time_find_best_cut']=time_find_best_cut
 
-        return heuristic
+        if debug==True:
+            self.__printHeuristic(heuristic,"cut-")
+
+        self.__heuristics[key] = heuristic
+
+        return dict(heuristic)